@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Micro-benchmark del costo de construir cada mensaje.
+
+Compara el camino anterior (MIMEMultipart + MIMEText serializado por send_message) con
+MessageBuilder (bytes listos para sendmail). Usa las plantillas reales y la configuración del
+.env, pero no abre conexiones SMTP ni toca MongoDB.
+
+    python -m benchmarks.bench_message_builder --messages 2000 --repeat 5
+"""
+
+import argparse
+import email
+import statistics
+import time
+from email.header import decode_header, make_header
+
+from src.modules.email_sender import EmailSender
+
+SUBJECTS = ["Álgebra Superior I", "Cálculo Diferencial e Integral I", "Geometría Analítica I", "Topología I", "Variable Compleja I", "Probabilidad I"]
+
+
+def sample_teachers(count):
+    return [
+        {"name": f"Dra. Profesora Número {i}", "email": f"profesor{i}@ciencias.unam.mx", "subject": SUBJECTS[i % len(SUBJECTS)], "otherSubjects": SUBJECTS[: i % 7]}
+        for i in range(count)
+    ]
+
+
+def build_mime(email_sender, teacher):
+    # Lo que hacía send_message: construir el MIMEMultipart y serializarlo con CRLF
+    msg = email_sender._create_email_message(teacher)
+    return msg.as_bytes(policy=msg.policy.clone(linesep="\r\n"))
+
+
+def build_fast(email_sender, teacher):
+    return email_sender.render_message(teacher)
+
+
+def measure(build, email_sender, teachers, repeat):
+    """Mejor y mediana de µs por mensaje sobre repeat corridas"""
+    per_message = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for teacher in teachers:
+            build(email_sender, teacher)
+        per_message.append((time.perf_counter() - start) / len(teachers) * 1e6)
+    return min(per_message), statistics.median(per_message)
+
+
+def check_equivalent(email_sender, teacher):
+    """Los dos caminos deben producir el mismo destinatario, asunto y cuerpo"""
+    old = email.message_from_bytes(build_mime(email_sender, teacher))
+    new = email.message_from_bytes(build_fast(email_sender, teacher))
+    old_body = old.get_payload()[0].get_payload(decode=True)
+    new_body = new.get_payload(decode=True)
+    assert old["To"] == new["To"], "Destinatarios distintos"
+    assert str(make_header(decode_header(old["Subject"]))) == str(make_header(decode_header(new["Subject"]))), "Asuntos distintos"
+    # _format_subjects elige asignaturas al azar; solo se comparan mensajes sin muestreo
+    assert len(teacher["otherSubjects"]) > 4 or old_body == new_body, "Cuerpos distintos"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo por mensaje: MIMEMultipart vs MessageBuilder")
+    parser.add_argument("--messages", type=int, default=2000, help="Mensajes por corrida (default: 2000)")
+    parser.add_argument("--repeat", type=int, default=5, help="Corridas por variante (default: 5)")
+    args = parser.parse_args()
+
+    email_sender = EmailSender()
+    teachers = sample_teachers(args.messages)
+    check_equivalent(email_sender, teachers[1])
+
+    # Calentamiento: carga de plantillas y caché del builder
+    for build in (build_mime, build_fast):
+        build(email_sender, teachers[0])
+
+    results = {}
+    for label, build in (("MIMEMultipart", build_mime), ("MessageBuilder", build_fast)):
+        results[label] = measure(build, email_sender, teachers, args.repeat)
+        best, median = results[label]
+        print(f"{label:<15} mejor {best:8.1f} µs/mensaje   mediana {median:8.1f} µs/mensaje")
+
+    speedup = results["MIMEMultipart"][0] / results["MessageBuilder"][0]
+    print(f"\nMessageBuilder es {speedup:.1f}x más rápido ({args.messages} mensajes x {args.repeat} corridas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Benchmark de los extractores de fciencias contra el corpus de HTML en benchmarks/fixtures/fciencias.
+
+Corre cada función de src.modules.fciencias_parser sobre el HTML crudo (sin Selenium, sin login ni
+red), verifica que el resultado coincida con expected.json y reporta páginas por segundo y memoria
+asignada por página. Cualquier cambio al parser debería venir acompañado de estos números.
+
+    python -m benchmarks.bench_parsers --repeat 200
+    python -m benchmarks.bench_parsers --record    # regenerar expected.json tras un cambio intencional
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from src.modules import fciencias_parser
+
+FIXTURES = Path(__file__).parent / "fixtures" / "fciencias"
+BASE_URL = "https://web.fciencias.unam.mx"
+SUBJECT = "Cálculo Diferencial e Integral I"
+PROFESSOR_URL = f"{BASE_URL}/directorio/20013"
+
+
+def extract_subjects(html):
+    return fciencias_parser.parse_subjects(fciencias_parser.make_soup(html), BASE_URL)
+
+
+def extract_professors(html):
+    return fciencias_parser.parse_professors_from_subject(fciencias_parser.make_soup(html), SUBJECT, BASE_URL)
+
+
+def extract_professor(html):
+    # Lo que hace extract_professor_data con la página del directorio: datos y enlace al historial
+    soup = fciencias_parser.make_soup(html)
+    professor = fciencias_parser.parse_professor(soup, PROFESSOR_URL, SUBJECT, [SUBJECT, "Variable Compleja I"])
+    professor.pop("scrapedAt")
+    return {"professor": professor, "allGroupsUrl": fciencias_parser.find_all_groups_url(soup, BASE_URL)}
+
+
+def extract_history(html):
+    return fciencias_parser.parse_history_subjects(fciencias_parser.make_soup(html))
+
+
+def extract_fallback(html):
+    soup = fciencias_parser.make_soup(html)
+    # parse_subjects_fallback deduplica con set(): el orden no es estable
+    return {"allGroupsUrl": fciencias_parser.find_all_groups_url(soup, BASE_URL), "subjects": sorted(fciencias_parser.parse_subjects_fallback(soup))}
+
+
+EXTRACTORS = {
+    "get_subjects": ("indiceplan.html", extract_subjects),
+    "get_professors_from_subject": ("grupos.html", extract_professors),
+    "extract_professor_data": ("directorio.html", extract_professor),
+    "_extract_all_subjects": ("historial.html", extract_history),
+    "_extract_subjects_fallback": ("directorio_sin_historial.html", extract_fallback),
+}
+
+
+def load_pages():
+    return {name: (FIXTURES / fixture).read_text(encoding="utf-8") for name, (fixture, _) in EXTRACTORS.items()}
+
+
+def measure(extract, html, repeat):
+    """Páginas por segundo (mediana de 5 tandas) y KiB asignados en el pico por página"""
+    batch = max(1, repeat // 5)
+    rates = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(batch):
+            extract(html)
+        rates.append(batch / (time.perf_counter() - start))
+
+    tracemalloc.start()
+    extract(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(rates), peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Páginas por segundo y memoria por página de cada extractor de fciencias")
+    parser.add_argument("--repeat", type=int, default=100, help="Páginas parseadas por extractor (default: 100)")
+    parser.add_argument("--only", choices=sorted(EXTRACTORS), nargs="+", help="Medir solo estos extractores")
+    parser.add_argument("--record", action="store_true", help="Reescribir expected.json con la salida actual y salir")
+    args = parser.parse_args()
+
+    # Los extractores registran una línea por página
+    logging.basicConfig(level=logging.WARNING)
+    pages = load_pages()
+    expected_path = FIXTURES / "expected.json"
+
+    results = {name: extract(pages[name]) for name, (_, extract) in EXTRACTORS.items()}
+    if args.record:
+        expected_path.write_text(json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+        print(f"Resultados guardados en {expected_path}")
+        return
+
+    expected = json.loads(expected_path.read_text(encoding="utf-8"))
+    mismatched = [name for name, result in results.items() if result != expected[name]]
+    if mismatched:
+        raise SystemExit(f"La salida no coincide con expected.json: {', '.join(mismatched)}")
+
+    print(f"=== Extractores de fciencias ({args.repeat} páginas por extractor) ===")
+    print(f"{'extractor':<30} {'KiB':>7} {'páginas/s':>10} {'KiB/página':>11}")
+    for name in args.only or EXTRACTORS:
+        extract = EXTRACTORS[name][1]
+        rate, peak_kib = measure(extract, pages[name], args.repeat)
+        print(f"{name:<30} {len(pages[name].encode()) / 1024:7.1f} {rate:10.1f} {peak_kib:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Benchmark de punta a punta del envío contra el SMTP sink local.
+
+Siembra N profesores sintéticos en una base de datos desechable (se borra al terminar) del
+MongoDB indicado con --mongo-uri, levanta el sink y ejecuta el mismo send_emails de main.py (o las
+etapas --render/--deliver con --outbox). Reporta mensajes por segundo, percentiles de latencia
+SMTP y las operaciones que se mandaron a MongoDB. Ningún correo sale de la máquina.
+
+El MongoDB del .env nunca se usa: el benchmark siembra y borra bases de datos, así que hay que
+apuntarlo explícitamente a un servidor desechable, por ejemplo uno temporal de Docker:
+
+    docker run --rm -d -p 27099:27017 --name bench-mongo mongo
+    python -m benchmarks.bench_send --mongo-uri mongodb://localhost:27099 --messages 2000 --workers 8 --latency 0.02
+    python -m benchmarks.bench_send --mongo-uri mongodb://localhost:27099 --error-rate 0.02 --error-codes 421 451 --rate-per-minute 600
+"""
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from pymongo import monitoring, uri_parser
+
+SUBJECTS = ["Álgebra Superior I", "Cálculo Diferencial e Integral I", "Geometría Analítica I", "Topología I", "Variable Compleja I", "Probabilidad I"]
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Cuenta los comandos que llegan a MongoDB por nombre (find, findAndModify, update, ...)"""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.enabled = False
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if self.enabled:
+            with self._lock:
+                self.counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def configure_environment(args, host, port, database):
+    """Apunta la configuración (que se lee al importar src.config.settings) al sink y a la base desechable de --mongo-uri"""
+    unlimited = str(10**9)
+    mongo = uri_parser.parse_uri(args.mongo_uri)
+    mongo_host, mongo_port = mongo["nodelist"][0]
+    os.environ.update(
+        {
+            "EMAIL_USER": "bench@localhost",
+            "EMAIL_PASSWORD": "bench",
+            "SMTP_SERVER": host,
+            "SMTP_PORT": str(port),
+            "SMTP_SECURITY": "ssl" if args.certfile else "none",
+            "SMTP_CA_FILE": args.certfile or "",
+            "EMAIL_ACCOUNTS": "",
+            "EMAIL_RATE_PER_MINUTE": str(args.rate_per_minute) if args.rate_per_minute else unlimited,
+            "EMAIL_RATE_PER_HOUR": unlimited,
+            "EMAIL_RATE_PER_DAY": unlimited,
+            # Todo MONGO_* se reemplaza: nada de la conexión puede venir del .env
+            "MONGO_HOST": mongo_host,
+            "MONGO_PORT": str(mongo_port),
+            "MONGO_USERNAME": mongo["username"] or "",
+            "MONGO_PASSWORD": mongo["password"] or "",
+            "MONGO_DATABASE": database,
+            "MONGO_COLLECTION": "teachers",
+            "MONGO_QUOTA_COLLECTION": "sendQuota",
+            "OUTBOX_DIR": tempfile.mkdtemp(prefix="bench-outbox-"),
+        }
+    )
+    os.environ.setdefault("PHONE_NUMBER", "5500000000")
+
+
+def seed_professors(db_manager, count):
+    db_manager.collection.insert_many(
+        [
+            {
+                "name": f"Dra. Profesora Sintética {i}",
+                "email": f"profesor{i}@bench.invalid",
+                "subject": SUBJECTS[i % len(SUBJECTS)],
+                "otherSubjects": SUBJECTS[: i % 7],
+                "infoAboutPersonalWork": "",
+                "isComplexAnalysis": False,
+                "wasEmailSend": False,
+            }
+            for i in range(count)
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de envío de punta a punta contra un SMTP local")
+    parser.add_argument(
+        "--mongo-uri",
+        required=True,
+        help="MongoDB desechable donde crear (y borrar) la base del benchmark; nunca se usa el del .env",
+    )
+    parser.add_argument("--messages", type=int, default=1000, help="Profesores sintéticos a sembrar (default: 1000)")
+    parser.add_argument("--workers", type=int, default=4, help="Conexiones SMTP en paralelo (default: 4)")
+    parser.add_argument("--outbox", action="store_true", help="Usar las etapas --render --deliver en lugar del envío directo")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia artificial del sink por mensaje, en segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Latencia aleatoria adicional del sink, en segundos")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de mensajes que el sink rechaza")
+    parser.add_argument("--error-codes", type=int, nargs="+", default=[451], help="Códigos de rechazo del sink (default: 451)")
+    parser.add_argument("--certfile", default=None, help="Certificado (y CA de confianza) para probar con TLS")
+    parser.add_argument("--keyfile", default=None)
+    parser.add_argument("--rate-per-minute", type=int, default=None, help="Límite por minuto del rate limiter (default: sin límite)")
+    parser.add_argument("--keep-db", action="store_true", help="No borrar la base de datos del benchmark al terminar")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    # El listener tiene que registrarse antes de crear cualquier MongoClient
+    counter = CommandCounter()
+    monitoring.register(counter)
+
+    from src.modules.smtp_sink import SmtpSink
+
+    sink = SmtpSink(
+        certfile=args.certfile,
+        keyfile=args.keyfile,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_codes=args.error_codes,
+    )
+    host, port = sink.start()
+    database = f"bench_{os.getpid()}_{int(time.time())}"
+    configure_environment(args, host, port, database)
+
+    import main as app
+    from src.modules.database_manager import DatabaseManager
+
+    db_manager = DatabaseManager()
+    try:
+        seed_professors(db_manager, args.messages)
+
+        counter.enabled = True
+        output = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            if args.outbox:
+                app.deliver_outbox(workers=args.workers, render=True)
+            else:
+                app.send_emails(workers=args.workers)
+        elapsed = time.perf_counter() - start
+        counter.enabled = False
+
+        summary = db_manager.email_status_summary()
+    finally:
+        sink.stop()
+        if not args.keep_db:
+            db_manager.client.drop_database(database)
+        db_manager.close()
+
+    latency_lines = [line for line in output.getvalue().splitlines() if line.startswith("Latencia SMTP")]
+    mode = "render + deliver" if args.outbox else "envío directo"
+    print(f"=== Benchmark de envío ({mode}, {args.workers} workers, {args.messages} mensajes) ===")
+    print(f"Enviados: {summary['sent']}  fallidos: {summary['failed']}  pendientes: {summary['pending'] - summary['failed']}")
+    print(f"Tiempo total: {elapsed:.2f} s  ->  {summary['sent'] / elapsed:.1f} mensajes/s")
+    for line in latency_lines:
+        print(line)
+    print(f"Sink: {dict(sink.stats)}")
+
+    total_ops = sum(counter.counts.values())
+    print(f"\nOperaciones MongoDB durante el envío: {total_ops} ({total_ops / max(args.messages, 1):.2f} por mensaje)")
+    for command, count in counter.counts.most_common():
+        print(f"  {command:<16} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
 
 import logging
-from src.modules.fciencias_scraper import FcienciasScraper
+from src.modules.scraper_daemon import connect
 
 logging.basicConfig(level=logging.INFO)
 
 def diagnose():
-    scraper = FcienciasScraper(headless=False)
-    scraper.setup_driver()
+    # Con el daemon corriendo no se abre navegador ni se hace login: ya tiene ambos
+    daemon = connect()
+    if daemon is not None:
+        scraper = daemon
+    else:
+        from src.modules.fciencias_scraper import FcienciasScraper
+
+        scraper = FcienciasScraper(headless=False)
+        scraper.setup_driver()
     
     try:
         # Solo probar login y obtener asignaturas
-        if scraper.login():
+        if daemon is not None or scraper.login():
             subjects = scraper.get_subjects()
             print(f"Login exitoso")
             print(f"Asignaturas encontradas: {len(subjects)}")
@@ -32,7 +39,8 @@ def diagnose():
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        scraper.driver.quit()
+        if daemon is None:
+            scraper.close_session()
 
 if __name__ == "__main__":
     diagnose()
\ No newline at end of file
@@ -1,23 +1,31 @@
 import argparse
 import logging
+import os
+import socket
+import threading
 import time
 
-from pymongo import MongoClient
+from decouple import config
 
-from src.config.settings import MONGO_CONFIG
+from src.config.settings import EMAIL_ACCOUNTS
 from src.modules.database_manager import DatabaseManager
 from src.modules.email_sender import EmailSender
 from src.modules.fciencias_scraper import FcienciasScraper
+from src.modules.outbox import Outbox
+from src.modules.rate_limiter import AdaptiveRateLimiter
+from src.modules.scraper_daemon import connect
+from src.modules.sender_engine import SenderAccount, SenderEngine
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 
-def scrape_professors():
+def scrape_professors(backend=None):
     """Ejecuta el scraping y guarda en la base de datos"""
     logging.info("Iniciando scraping de profesores...")
 
-    scraper = FcienciasScraper(headless=True)
+    # Si hay un daemon de scraping corriendo, el crawl usa su navegador y su sesión
+    scraper = connect(backend=backend) or FcienciasScraper(headless=True, backend=backend)
     professors = scraper.scrape_all_professors()
 
     db_manager = DatabaseManager()
@@ -28,101 +36,238 @@ def scrape_professors():
     return results
 
 
-def send_emails():
-    """Envía emails a profesores con diagnóstico mejorado"""
+def print_diagnosis(db_manager):
+    """Muestra el resumen de estados de envío de la colección"""
+    summary = db_manager.email_status_summary()
+    print(f"\n=== DIAGNÓSTICO ===")
+    print(f"Total de documentos en la colección: {summary['total']}")
+    print(f"wasEmailSend: True  -> {summary['sent']}")
+    print(f"wasEmailSend: False -> {summary['pending']}")
+    print(f"wasEmailSend: NO EXISTE -> {summary['missing']}")
+    print(f"sendStatus: claimed -> {summary['claimed']}")
+    print(f"sendStatus: failed  -> {summary['failed']}")
+
+
+def render_outbox(rendered_event=None):
+    """Etapa de render: serializa el mensaje de cada profesor pendiente en el outbox, sin enviarlo"""
     email_sender = EmailSender()
-    client = MongoClient(
-        host=MONGO_CONFIG["host"],
-        port=MONGO_CONFIG["port"],
-        username=MONGO_CONFIG["username"],
-        password=MONGO_CONFIG["password"],
-    )
+    db_manager = DatabaseManager()
+    outbox = Outbox(config("OUTBOX_DIR", default="outbox"))
+    rendered = 0
 
-    db = client[MONGO_CONFIG["database"]]
-    collection = db[MONGO_CONFIG["collection"]]
+    try:
+        for professor in db_manager.iter_pending_professors(max_attempts=config("EMAIL_MAX_ATTEMPTS", default=3, cast=int)):
+            key = str(professor["_id"])
+            if outbox.has_pending(key):
+                continue
+            outbox.put(key, email_sender.render_message(professor))
+            rendered += 1
+    finally:
+        db_manager.close()
+        if rendered_event is not None:
+            rendered_event.set()
+
+    counts = outbox.counts()
+    print(f"Mensajes renderizados: {rendered}. Outbox: {counts['pending']} pendientes, {counts['sent']} enviados, {counts['failed']} fallidos")
+    return rendered
 
-    # DIAGNÓSTICO: Ver todos los documentos en la colección
-    all_teachers = list(collection.find())
-    print(f"\n=== DIAGNÓSTICO ===")
-    print(f"Total de documentos en la colección: {len(all_teachers)}")
 
-    for teacher in all_teachers:
-        print(f"Profesor: {teacher['name']}")
-        print(f"Email: {teacher['email']}")
-        print(f"wasEmailSend: {teacher.get('wasEmailSend', 'NO EXISTE')}")
-        print(f"---")
+def send_emails(diagnose=False, workers=None, outbox=None, rendered_event=None):
+    """Envía emails a profesores con varios workers SMTP, confirmando los envíos por lotes.
 
-    # Buscar profesores que NO han recibido email
-    teachers = list(collection.find({"wasEmailSend": False}))
-    print(f"\nProfesores con 'wasEmailSend: False': {len(teachers)}")
+    Los profesores se reclaman de uno en uno con un lease, así que se pueden correr varios procesos
+    a la vez (en uno o varios hosts) sobre la misma colección sin que dos tomen el mismo profesor.
+    Con outbox se envían los mensajes ya renderizados (etapa de deliver) en lugar de generarlos aquí;
+    con rendered_event se siguen esperando mensajes nuevos hasta que el render termine.
+    """
+    email_sender = EmailSender()
+    db_manager = DatabaseManager()
+    workers = workers or config("EMAIL_WORKERS", default=4, cast=int)
+    lease_seconds = config("EMAIL_LEASE_SECONDS", default=300, cast=float)
+    max_attempts = config("EMAIL_MAX_ATTEMPTS", default=3, cast=int)
 
+    if diagnose:
+        print_diagnosis(db_manager)
+
+    # Los cambios de estado (sent/failed/pending) se escriben en bulk_write por tamaño, por tiempo y al terminar
+    status_writer = db_manager.bulk_writer(auto_flush=True)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    # Renueva los leases de los reclamados mientras esperan en la cola o un token de envío
+    lease_keeper = db_manager.lease_keeper(worker_id, lease_seconds)
+    # Límites del proveedor por cuenta; cada envío se reserva en los contadores de MongoDB, compartidos entre procesos y reinicios
+    quota_store = db_manager.quota_store()
+    accounts = [
+        SenderAccount(
+            account,
+            AdaptiveRateLimiter(
+                per_minute=account.get("per_minute", config("EMAIL_RATE_PER_MINUTE", default=20, cast=int)),
+                per_hour=account.get("per_hour", config("EMAIL_RATE_PER_HOUR", default=100, cast=int)),
+                per_day=account.get("per_day", config("EMAIL_RATE_PER_DAY", default=500, cast=int)),
+                account=account["user"],
+                store=quota_store,
+            ),
+        )
+        for account in EMAIL_ACCOUNTS
+    ]
+    engine = SenderEngine(
+        email_sender,
+        workers=workers,
+        max_messages_per_connection=config("SMTP_MAX_MESSAGES_PER_CONNECTION", default=100, cast=int),
+        accounts=accounts,
+    )
     start_time = time.time()
+    stats = {"total": 0, "sent": 0, "failed": 0, "skipped": 0}
+
+    def release_lease(teacher):
+        # El lease se sigue renovando hasta que el nuevo estado está en MongoDB; si no, otro proceso podría reclamarlo antes
+        return lambda: lease_keeper.release(teacher["_id"])
+
+    def on_sent(teacher):
+        status_writer.add(db_manager.email_sent_operation(teacher["_id"], worker_id), release_lease(teacher))
+        if outbox is not None:
+            outbox.move(teacher["outboxKey"], "sent")
+        print(f"✓ Email enviado exitosamente a {teacher['email']}")
+
+    def on_error(teacher, error):
+        status_writer.add(db_manager.email_failed_operation(teacher["_id"], worker_id, str(error)), release_lease(teacher))
+        if outbox is not None:
+            outbox.move(teacher["outboxKey"], "failed")
+        print(f"✗ Error enviando a {teacher['email']} (intento {teacher.get('sendAttempts', 1)}): {str(error)}")
+
+    def on_skipped(teacher):
+        status_writer.add(db_manager.release_claim_operation(teacher["_id"], worker_id), release_lease(teacher))
 
     try:
-        if teachers:
-            email_sender.connect()
-            sent_count = 0
-
-            for teacher in teachers:
-                try:
-                    print(f"\nIntentando enviar email a: {teacher['email']}")
-                    email_sender.send_email(teacher, use_existing_connection=True)
-                    collection.update_one({"_id": teacher["_id"]}, {"$set": {"wasEmailSend": True}})
-                    print(f"✓ Email enviado exitosamente a {teacher['email']}")
-                    sent_count += 1
-                except Exception as e:
-                    print(f"✗ Error enviando a {teacher['email']}: {str(e)}")
+        print(f"\nEnviando con {workers} conexiones SMTP en paralelo por cuenta")
+        for account in accounts:
+            print(f"  {account.user}: cuota diaria restante {account.budget()}")
+        if outbox is None:
+            pending = db_manager.claim_pending_professors(worker_id, lease_seconds=lease_seconds, max_attempts=max_attempts)
         else:
+            pending = claim_outbox_messages(db_manager, outbox, worker_id, lease_seconds, max_attempts, rendered_event)
+        stats = engine.run(hold_leases(pending, lease_keeper), on_sent=on_sent, on_error=on_error, on_skipped=on_skipped)
+
+        if stats["skipped"]:
+            print(f"Se agotó la cuota diaria de todas las cuentas; {stats['skipped']} emails quedan pendientes para la siguiente ejecución")
+        for account in accounts:
+            throttled = f", el servidor pidió bajar la velocidad {account.rate_limiter.throttled} veces" if account.rate_limiter.throttled else ""
+            print(f"  {account.user}: {account.sent} enviados{throttled}")
+
+        if not stats["total"]:
             print("No se encontraron profesores para enviar emails.")
             print("Posibles causas:")
             print("1. Todos los profesores ya tienen 'wasEmailSend: true'")
             print("2. El campo 'wasEmailSend' no existe en los documentos")
             print("3. No hay documentos en la colección")
+            print("4. Otro proceso tiene reclamados los pendientes, o fallaron EMAIL_MAX_ATTEMPTS veces")
+            print("Ejecuta con --diagnose para ver el conteo por estado")
 
     finally:
-        email_sender.disconnect()
-        client.close()
+        try:
+            status_writer.close()
+        finally:
+            lease_keeper.close()
+        quota_store.close()
+        db_manager.close()
         end_time = time.time()
         execution_time = end_time - start_time
-        print(f"\nSe enviaron {sent_count} emails en {execution_time:.2f} segundos")
+        print(f"\nSe enviaron {stats['sent']} de {stats['total']} emails en {execution_time:.2f} segundos")
+
+    latency = engine.latency_percentiles()
+    if latency:
+        print(f"Latencia SMTP por mensaje: p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, p99 {latency['p99']:.1f} ms")
+    return {**stats, "elapsed": execution_time, "latency": latency}
+
+
+def hold_leases(professors, lease_keeper):
+    """Registra cada profesor reclamado en el LeaseKeeper en cuanto sale de la cola de envío"""
+    for professor in professors:
+        lease_keeper.hold(professor["_id"])
+        yield professor
+
+
+def claim_outbox_messages(db_manager, outbox, worker_id, lease_seconds, max_attempts, rendered_event=None):
+    """Mensajes del outbox cuyo profesor se pudo reclamar; los ya enviados por otra vía pasan a sent/"""
+    for message in outbox.drain(until=rendered_event):
+        professor = db_manager.claim_professor(message["_id"], worker_id, lease_seconds=lease_seconds, max_attempts=max_attempts)
+        if professor is None:
+            if db_manager.is_email_sent(message["_id"]):
+                outbox.move(message["outboxKey"], "sent")
+            continue
+        message["sendAttempts"] = professor.get("sendAttempts", 1)
+        yield message
+
+
+def deliver_outbox(diagnose=False, workers=None, render=False):
+    """Etapa de deliver: drena el outbox; con render, renderiza en otro hilo y envía conforme llegan los mensajes"""
+    outbox = Outbox(config("OUTBOX_DIR", default="outbox"))
+    if not render:
+        send_emails(diagnose=diagnose, workers=workers, outbox=outbox)
+        return
+
+    rendered_event = threading.Event()
+    renderer = threading.Thread(target=render_outbox, args=(rendered_event,), name="outbox-render", daemon=True)
+    renderer.start()
+    try:
+        send_emails(diagnose=diagnose, workers=workers, outbox=outbox, rendered_event=rendered_event)
+    finally:
+        renderer.join()
 
 
 def main():
     parser = argparse.ArgumentParser(description="Sistema de envío de emails a profesores")
     parser.add_argument("--scrape", action="store_true", help="Ejecutar scraping antes de enviar emails")
     parser.add_argument("--scrape-only", action="store_true", help="Solo ejecutar scraping, no enviar emails")
-    parser.add_argument("--reset-emails", action="store_true", help="Resetear todos los wasEmailSend a False")
+    parser.add_argument("--reset-emails", action="store_true", help="Regresar todos los profesores a pendiente (wasEmailSend False, sin reclamos ni intentos)")
+    parser.add_argument("--diagnose", action="store_true", help="Mostrar el conteo de profesores por estado de envío antes de enviar")
+    parser.add_argument("--workers", type=int, default=None, help="Conexiones SMTP en paralelo para el envío (default: EMAIL_WORKERS o 4)")
+    parser.add_argument("--render", action="store_true", help="Renderizar los mensajes pendientes en el outbox (OUTBOX_DIR) sin enviarlos")
+    parser.add_argument("--deliver", action="store_true", help="Enviar los mensajes ya renderizados del outbox; junto con --render, renderiza y envía a la vez")
+    parser.add_argument("--ensure-indexes", action="store_true", help="Crear los índices de la colección de profesores y salir")
+    parser.add_argument("--backend", choices=FcienciasScraper.BACKENDS, default=None, help="Backend de scraping: selenium o http (default: SCRAPER_BACKEND)")
 
     args = parser.parse_args()
 
+    if args.ensure_indexes:
+        ensure_indexes()
+        return
+
     # Nueva opción para resetear los emails
     if args.reset_emails:
         reset_email_status()
         return
 
     if args.scrape or args.scrape_only:
-        scrape_professors()
+        scrape_professors(backend=args.backend)
 
-    if not args.scrape_only:
-        send_emails()
+    if args.scrape_only:
+        return
 
+    if args.deliver:
+        deliver_outbox(diagnose=args.diagnose, workers=args.workers, render=args.render)
+    elif args.render:
+        render_outbox()
+    else:
+        send_emails(diagnose=args.diagnose, workers=args.workers)
 
-def reset_email_status():
-    """Función para resetear el estado de envío de emails"""
-    client = MongoClient(
-        host=MONGO_CONFIG["host"],
-        port=MONGO_CONFIG["port"],
-        username=MONGO_CONFIG["username"],
-        password=MONGO_CONFIG["password"],
-    )
 
-    db = client[MONGO_CONFIG["database"]]
-    collection = db[MONGO_CONFIG["collection"]]
+def ensure_indexes():
+    """Crea los índices de la colección y muestra el resultado"""
+    db_manager = DatabaseManager(ensure_indexes=False)
+    status = db_manager.ensure_indexes()
+    db_manager.close()
+
+    for name, ok in status.items():
+        print(f"{'✓' if ok else '✗'} {name}")
+
 
-    result = collection.update_many({}, {"$set": {"wasEmailSend": False}})
-    print(f"Reseteados {result.modified_count} documentos. Todos los 'wasEmailSend' ahora son False")
+def reset_email_status():
+    """Función para resetear el estado de envío de emails"""
+    db_manager = DatabaseManager(ensure_indexes=False)
+    modified = db_manager.reset_send_status()
+    db_manager.close()
 
-    client.close()
+    print(f"Reseteados {modified} documentos. Todos los profesores quedan pendientes de envío")
 
 
 if __name__ == "__main__":
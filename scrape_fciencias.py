@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 
+import argparse
 import logging
 import os
 import sys
@@ -9,51 +10,148 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from decouple import config
 
 from src.modules.database_manager import DatabaseManager
-from src.modules.fciencias_scraper import FcienciasScraper
+from src.modules.scraper_daemon import connect
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", handlers=[logging.FileHandler("scraping.log"), logging.StreamHandler(sys.stdout)]
 )
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Scraping de profesores de la Facultad de Ciencias")
+    parser.add_argument(
+        "--backend",
+        choices=("selenium", "http"),
+        default=None,
+        help="Backend para descargar páginas: 'http' reutiliza la sesión de Chrome con requests (default: SCRAPER_BACKEND o selenium)",
+    )
+    parser.add_argument("--concurrency", type=int, default=None, help="Peticiones simultáneas máximas con el backend http (default: CRAWL_CONCURRENCY o 8)")
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=None,
+        help="Peticiones por segundo máximas por host en el crawl concurrente: backend http con --concurrency o pool de --browsers, sumando todos los navegadores (default: CRAWL_RATE_LIMIT o 2)",
+    )
+    parser.add_argument(
+        "--browsers",
+        type=int,
+        default=None,
+        help="Navegadores Chrome en paralelo con el backend selenium; comparten la sesión del login y el límite de --rate-limit (default: BROWSER_POOL_SIZE o 1)",
+    )
+    parser.add_argument(
+        "--lean-browser",
+        action="store_true",
+        default=None,
+        help="Perfil ligero de Chrome: carga eager, sin imágenes, CSS, fuentes ni scripts de terceros y un perfil temporal por navegador (default: BROWSER_LEAN)",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=None,
+        help="Procesos que parsean el HTML mientras se descarga la siguiente página; 1 parsea en el mismo hilo (default: PARSE_WORKERS o núcleos)",
+    )
+    parser.add_argument("--fresh-login", action="store_true", help="Ignorar la sesión guardada y hacer login con el formulario")
+    parser.add_argument("--no-cache", action="store_true", help="No usar la caché de páginas en disco")
+    parser.add_argument(
+        "--refresh-pattern",
+        action="append",
+        default=[],
+        metavar="REGEX",
+        help="Forzar la descarga de las URLs que coincidan con el patrón, ignorando la caché (se puede repetir)",
+    )
+    parser.add_argument("--incremental", action="store_true", help="Omitir directorio e historial de profesores scrapeados recientemente")
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        default=None,
+        metavar="HORAS",
+        help="Ventana de frescura del modo incremental en horas (default: SCRAPE_FRESHNESS_HOURS o 168)",
+    )
+    parser.add_argument("--no-daemon", action="store_true", help="No usar el daemon de scraping aunque esté corriendo; abrir un navegador propio")
+    parser.add_argument("--resume", default=None, metavar="RUN_ID", help="Reanudar una corrida interrumpida desde su checkpoint")
+    return parser.parse_args()
+
+
+def log_professor_summary(professors, summary):
+    """Registra el resumen de cada profesor conforme pasa hacia la base de datos"""
+    logger = logging.getLogger(__name__)
+
+    for prof in professors:
+        summary["count"] += 1
+        logger.info(f"{summary['count']}. {prof['name']} - {prof['email']}")
+        logger.info(f"   Materia principal: {prof['subject']}")
+        logger.info(f"   Otras materias: {len(prof['otherSubjects'])}")
+        if prof["otherSubjects"]:
+            logger.info(f"   -> {', '.join(prof['otherSubjects'][:3])}")
+            if len(prof["otherSubjects"]) > 3:
+                logger.info(f"   -> ... y {len(prof['otherSubjects']) - 3} más")
+        yield prof
+
+
 def main():
     logger = logging.getLogger(__name__)
+    args = parse_args()
 
     try:
         logger.info("Iniciando scraping de la Facultad de Ciencias...")
 
-        # Inicializar scraper
-        scraper = FcienciasScraper(headless=not config("OPEN_BROWSER", default=False, cast=bool))
+        # Con un daemon corriendo (y configurado como se pidió) el crawl se hace en su navegador, ya abierto y con sesión
+        scraper = connect(
+            use_daemon=not args.no_daemon,
+            refresh_patterns=args.refresh_pattern,
+            backend=args.backend,
+            max_concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+            parse_workers=args.parse_workers,
+            browsers=args.browsers,
+            lean_browser=args.lean_browser,
+            use_cache=False if args.no_cache else None,
+            reuse_session=False if args.fresh_login else None,
+        )
+        if scraper is None:
+            # Selenium solo se importa cuando hace falta un navegador propio
+            from src.modules.fciencias_scraper import FcienciasScraper
+
+            scraper = FcienciasScraper(
+                headless=not config("OPEN_BROWSER", default=False, cast=bool),
+                backend=args.backend,
+                max_concurrency=args.concurrency,
+                rate_limit=args.rate_limit,
+                parse_workers=args.parse_workers,
+                browsers=args.browsers,
+                lean_browser=args.lean_browser,
+                reuse_session=not args.fresh_login,
+                use_cache=not args.no_cache,
+                refresh_patterns=args.refresh_pattern,
+            )
+
+        db_manager = DatabaseManager()
+
+        known_professors = None
+        max_age = None
+        if args.incremental:
+            known_professors = db_manager.get_scraped_index()
+            max_age = (args.max_age or config("SCRAPE_FRESHNESS_HOURS", default=168, cast=float)) * 3600
 
         # Obtener datos de profesores - SIN LIMITACIÓN para producción
         logger.info("Obteniendo datos de profesores...")
-        professors = scraper.scrape_all_professors(max_subjects=None)  # ← Cambiar a None
+        professors = scraper.scrape_all_professors(max_subjects=None, known_professors=known_professors, max_age=max_age, resume_run_id=args.resume)  # ← Cambiar a None
+
+        # Los profesores se guardan conforme el scraper los emite
+        summary = {"count": 0}
+        results = db_manager.save_professors(log_professor_summary(professors, summary))
+        if scraper.subject_associations:
+            association_results = db_manager.add_subject_associations(scraper.subject_associations)
+            logger.info(f"Modo incremental: {association_results['updated']} profesores recientes con asignaturas nuevas")
+        db_manager.close()
 
-        if not professors:
+        if not summary["count"] and not scraper.subject_associations:
             logger.error("No se obtuvieron datos de profesores")
             sys.exit(1)
 
-        logger.info(f"Se obtuvieron datos de {len(professors)} profesores únicos")
-
-        # Guardar en base de datos
-        db_manager = DatabaseManager()
-        results = db_manager.save_professors(professors)
-        db_manager.close()
-
+        logger.info(f"Se obtuvieron datos de {summary['count']} profesores únicos")
         logger.info(f"Proceso completado: {results['saved']} nuevos, {results['updated']} actualizados")
 
-        # Mostrar resumen detallado
-        logger.info("=== RESUMEN DE PROFESORES OBTENIDOS ===")
-        for i, prof in enumerate(professors, 1):
-            logger.info(f"{i}. {prof['name']} - {prof['email']}")
-            logger.info(f"   Materia principal: {prof['subject']}")
-            logger.info(f"   Otras materias: {len(prof['otherSubjects'])}")
-            if prof["otherSubjects"]:
-                logger.info(f"   -> {', '.join(prof['otherSubjects'][:3])}")
-                if len(prof["otherSubjects"]) > 3:
-                    logger.info(f"   -> ... y {len(prof['otherSubjects']) - 3} más")
-            logger.info("")
-
     except Exception as e:
         logger.error(f"Error en el proceso de scraping: {str(e)}")
         sys.exit(1)
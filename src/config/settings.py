@@ -1,3 +1,5 @@
+import json
+
 from decouple import config
 
 EMAIL_CONFIG = {
@@ -5,8 +7,15 @@ EMAIL_CONFIG = {
     "password": config("EMAIL_PASSWORD"),
     "server": config("SMTP_SERVER"),
     "port": config("SMTP_PORT", cast=int),
+    # ssl (SMTP_SSL, puerto 465), starttls (puerto 587) o none (solo para servidores locales como el sink de pruebas)
+    "security": config("SMTP_SECURITY", default="ssl"),
+    "ca_file": config("SMTP_CA_FILE", default=None),
 }
 
+# Cuentas de envío: JSON con una lista de {"user", "password"} y opcionalmente "server", "port",
+# "per_minute", "per_hour" y "per_day". Sin EMAIL_ACCOUNTS se usa solo la cuenta de EMAIL_CONFIG.
+EMAIL_ACCOUNTS = [{**EMAIL_CONFIG, **account} for account in json.loads(config("EMAIL_ACCOUNTS", default="") or "[]")] or [EMAIL_CONFIG]
+
 MONGO_CONFIG = {
     "host": config("MONGO_HOST"),
     "port": config("MONGO_PORT", cast=int),
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+
+class HostRateLimiter:
+    """Reparte las peticiones de cada host en intervalos mínimos para no saturar el servidor.
+
+    Con interval_for (url -> segundos) el intervalo de cada petición es el mayor entre ese valor y
+    el de requests_per_second, así una pausa adaptativa puede frenar el crawl pero nunca rebasar la tasa.
+    """
+
+    def __init__(self, requests_per_second, interval_for=None):
+        self.min_interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.interval_for = interval_for
+        self._next_slot = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, url):
+        """Espera hasta que el host de la URL tenga un turno libre"""
+        host = urlparse(url).netloc
+        loop = asyncio.get_running_loop()
+        interval = self.min_interval
+        if self.interval_for is not None:
+            interval = max(interval, self.interval_for(url))
+
+        async with self._lock:
+            now = loop.time()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + interval
+
+        delay = slot - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncCrawler:
+    """Motor asyncio con límite global de concurrencia y límite de tasa por host"""
+
+    def __init__(self, fetch, max_concurrency=8, requests_per_second=2.0, interval_for=None):
+        # fetch es una función síncrona url -> html; se ejecuta en hilos para no bloquear el loop
+        self.fetch = fetch
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        # interval_for (url -> segundos) alarga el intervalo por host, p. ej. con la pausa de CrawlDelayController
+        self.interval_for = interval_for
+        self._semaphore = None
+        self._rate_limiter = None
+        self._loop = None
+        self._task = None
+        self._cancelled = False
+
+    async def fetch_page(self, url):
+        """Descarga una página respetando la concurrencia y la tasa configuradas"""
+        async with self._semaphore:
+            await self._rate_limiter.wait(url)
+            return await asyncio.to_thread(self.fetch, url)
+
+    async def gather(self, coroutines):
+        """Ejecuta corrutinas de crawl en paralelo conservando el orden de los resultados"""
+        return await asyncio.gather(*coroutines)
+
+    def run(self, main):
+        """Ejecuta main(crawler) en un loop nuevo y regresa su resultado"""
+
+        async def runner():
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            if self._cancelled:
+                raise asyncio.CancelledError()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._rate_limiter = HostRateLimiter(self.requests_per_second, self.interval_for)
+            pacing = ", intervalo adaptativo" if self.interval_for is not None else ""
+            logger.info(f"Crawl asíncrono: concurrencia={self.max_concurrency}, tasa máxima={self.requests_per_second} req/s por host{pacing}")
+            return await main(self)
+
+        return asyncio.run(runner())
+
+    def cancel(self):
+        """Cancela el crawl en curso; se puede llamar desde otro hilo"""
+        self._cancelled = True
+        if self._loop is not None and self._task is not None and not self._task.done():
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:
+                # El loop ya terminó por su cuenta
+                pass
@@ -0,0 +1,209 @@
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from .browser_profile import load_page, quit_driver
+
+logger = logging.getLogger(__name__)
+
+COOKIE_FIELDS = ("name", "value", "path", "domain", "secure", "httpOnly", "expiry")
+
+
+def process_tree_rss_mb(root_pid):
+    """RSS en MB de un proceso y todos sus descendientes (Linux, vía /proc); None si no se puede medir"""
+    if not os.path.isdir("/proc"):
+        return None
+
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # El nombre del proceso va entre paréntesis y puede tener espacios
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    total_kb = 0
+    pending = [root_pid]
+    while pending:
+        pid = pending.pop()
+        pending.extend(children.get(pid, []))
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+class BrowserInstance:
+    """Un Chrome del pool y las páginas que ha cargado desde que arrancó"""
+
+    def __init__(self, index, driver):
+        self.index = index
+        self.driver = driver
+        self.pages = 0
+
+    def memory_mb(self):
+        try:
+            return process_tree_rss_mb(self.driver.service.process.pid)
+        except AttributeError:
+            return None
+
+
+class BrowserPool:
+    """K navegadores con la misma sesión: cada fetch toma el primero libre y lo devuelve al terminar.
+
+    Solo un navegador hace login; los demás reciben sus cookies. Las descargas del crawl (grupos,
+    directorio, historial) salen de una misma cola de navegadores libres, así que se reparten solas
+    entre las instancias. Un navegador que se cae (WebDriverException que no es timeout) o que rebasa
+    max_memory_mb de RSS entre Chrome y sus renderers se cierra y se reemplaza por uno nuevo con las
+    mismas cookies; on_restart recibe la instancia nueva (el dueño del navegador adoptado la usa para
+    no quedarse con el driver cerrado).
+    """
+
+    def __init__(self, create_driver, base_url, size, wait_timeout=30, max_memory_mb=None, memory_check_every=20, page_stats=None, on_restart=None):
+        self.create_driver = create_driver
+        self.base_url = base_url
+        self.size = size
+        self.wait_timeout = wait_timeout
+        self.max_memory_mb = max_memory_mb
+        self.memory_check_every = memory_check_every
+        self.page_stats = page_stats
+        self.on_restart = on_restart
+        self.cookies = []
+        self.restarts = 0
+        self._instances = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    def start(self, logged_in_driver):
+        """Adopta el navegador que ya hizo login y abre los demás en paralelo con sus cookies"""
+        self.cookies = logged_in_driver.get_cookies()
+        self._add(BrowserInstance(0, logged_in_driver))
+
+        with ThreadPoolExecutor(max_workers=self.size - 1 or 1) as executor:
+            futures = [executor.submit(self._new_instance, index) for index in range(1, self.size)]
+        for future in futures:
+            try:
+                self._add(future.result())
+            except Exception as e:
+                logger.error(f"No se pudo abrir un navegador del pool: {str(e)}")
+
+        logger.info(f"Pool de {len(self._instances)} navegadores listo ({len(self.cookies)} cookies de sesión compartidas)")
+
+    def set_cookies(self, cookies):
+        """Pasa una sesión nueva (tras repetir el login) a los navegadores libres y a los que se abran después"""
+        self.cookies = cookies
+        refreshed = []
+        while True:
+            try:
+                instance = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                instance.driver.get(self.base_url)
+                instance.driver.delete_all_cookies()
+                for cookie in cookies:
+                    instance.driver.add_cookie({key: cookie[key] for key in COOKIE_FIELDS if key in cookie})
+            except WebDriverException as e:
+                logger.warning(f"No se pudieron actualizar las cookies del navegador {instance.index}: {str(e)}")
+            refreshed.append(instance)
+        for instance in refreshed:
+            self._idle.put(instance)
+
+    def _add(self, instance):
+        with self._lock:
+            self._instances.append(instance)
+        self._idle.put(instance)
+
+    def _new_instance(self, index):
+        driver = self.create_driver(index)
+        try:
+            # add_cookie solo acepta cookies del dominio de la página actual
+            driver.get(self.base_url)
+            for cookie in self.cookies:
+                driver.add_cookie({key: cookie[key] for key in COOKIE_FIELDS if key in cookie})
+        except Exception:
+            quit_driver(driver)
+            raise
+        return BrowserInstance(index, driver)
+
+    def _restart(self, instance, reason):
+        """Reemplaza un navegador; si no se puede abrir otro, el pool se queda con uno menos"""
+        logger.warning(f"Reiniciando navegador {instance.index} ({reason})")
+        with self._lock:
+            self._instances.remove(instance)
+            self.restarts += 1
+        try:
+            quit_driver(instance.driver)
+        except Exception as e:
+            # Lo normal si se cayó: el proceso de Chrome ya no responde
+            logger.debug(f"Error cerrando el navegador {instance.index} antes de reiniciarlo: {str(e)}")
+
+        replacement = self._new_instance(instance.index)
+        with self._lock:
+            self._instances.append(replacement)
+        if self.on_restart is not None:
+            self.on_restart(replacement)
+        return replacement
+
+    def _checkout(self):
+        while True:
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                with self._lock:
+                    if not self._instances:
+                        raise RuntimeError("No queda ningún navegador en el pool")
+
+    def fetch(self, url):
+        """Carga la página en el primer navegador libre y regresa su HTML cuando aparece #info-contenido"""
+        instance = self._checkout()
+        try:
+            try:
+                page_source = self._load(instance, url)
+            except TimeoutException:
+                raise
+            except WebDriverException as e:
+                instance = self._restart(instance, f"error: {e.msg}")
+                page_source = self._load(instance, url)
+
+            instance.pages += 1
+            if self.max_memory_mb and instance.pages % self.memory_check_every == 0:
+                memory = instance.memory_mb()
+                if memory is not None and memory > self.max_memory_mb:
+                    instance = self._restart(instance, f"{memory:.0f} MB > {self.max_memory_mb} MB")
+            return page_source
+        finally:
+            with self._lock:
+                alive = instance in self._instances
+            if alive:
+                self._idle.put(instance)
+
+    def _load(self, instance, url):
+        return load_page(instance.driver, WebDriverWait(instance.driver, self.wait_timeout), url, self.page_stats)
+
+    def stats(self):
+        with self._lock:
+            return {"browsers": len(self._instances), "restarts": self.restarts, "pages": {instance.index: instance.pages for instance in self._instances}}
+
+    def close(self):
+        with self._lock:
+            instances, self._instances = self._instances, []
+        for instance in instances:
+            try:
+                quit_driver(instance.driver)
+            except Exception as e:
+                logger.warning(f"Error cerrando navegador {instance.index}: {str(e)}")
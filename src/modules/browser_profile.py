@@ -0,0 +1,123 @@
+import logging
+import os
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+logger = logging.getLogger(__name__)
+
+# Del sitio solo se lee el HTML de #info-contenido: imágenes, estilos, fuentes y scripts de terceros sobran
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.svg",
+    "*.webp",
+    "*.ico",
+    "*.css",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.eot",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*doubleclick.net*",
+    "*fonts.googleapis.com*",
+    "*fonts.gstatic.com*",
+    "*facebook.net*",
+    "*twitter.com/widgets*",
+]
+
+# Recursos pedidos hasta ahora y bytes transferidos (documento + recursos), según Resource Timing
+PERFORMANCE_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+return [resources.length, resources.reduce((total, entry) => total + (entry.transferSize || 0), navigation ? navigation.transferSize || 0 : 0)];
+"""
+
+
+def apply_lean_options(options, profile_root=None, index=0):
+    """Perfil ligero: driver.get regresa en DOMContentLoaded y sin imágenes; regresa el directorio de perfil creado, si hay"""
+    options.page_load_strategy = "eager"
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    if not profile_root:
+        return None
+    # Un directorio nuevo por navegador y por corrida: Chrome no deja que dos instancias compartan perfil
+    os.makedirs(profile_root, exist_ok=True)
+    profile_dir = tempfile.mkdtemp(prefix=f"chrome-{index}-", dir=profile_root)
+    options.add_argument(f"--user-data-dir={os.path.abspath(profile_dir)}")
+    return profile_dir
+
+
+def quit_driver(driver):
+    """Cierra Chrome y borra el perfil que le creó apply_lean_options (guardado en driver.profile_dir)"""
+    try:
+        driver.quit()
+    finally:
+        profile_dir = getattr(driver, "profile_dir", None)
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def block_requests(driver, patterns):
+    """Bloquea con CDP las peticiones cuya URL coincida con algún patrón (comodín *)"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+class PageLoadStats:
+    """Tiempos y recursos de cada página cargada con Chrome, para comparar perfiles"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations = []
+        self.resources = 0
+        self.transferred = 0
+
+    def record(self, seconds, resources, transferred):
+        with self._lock:
+            self.durations.append(seconds)
+            self.resources += resources
+            self.transferred += transferred
+
+    def summary(self):
+        with self._lock:
+            pages = len(self.durations)
+            if not pages:
+                return {"pages": 0}
+            durations = sorted(self.durations)
+            return {
+                "pages": pages,
+                "avg_ms": round(statistics.fmean(durations) * 1000),
+                "p50_ms": round(durations[pages // 2] * 1000),
+                "p95_ms": round(durations[min(pages - 1, int(pages * 0.95))] * 1000),
+                "resources_per_page": round(self.resources / pages, 1),
+                "kib_per_page": round(self.transferred / pages / 1024, 1),
+            }
+
+
+def load_page(driver, wait, url, stats=None):
+    """Carga una página y espera a #info-contenido; registra el tiempo y los recursos en stats"""
+    start = time.perf_counter()
+    driver.get(url)
+    wait.until(EC.presence_of_element_located((By.ID, "info-contenido")))
+    elapsed = time.perf_counter() - start
+    page_source = driver.page_source
+
+    if stats is not None:
+        try:
+            resources, transferred = driver.execute_script(PERFORMANCE_SCRIPT)
+        except WebDriverException:
+            resources, transferred = 0, 0
+        stats.record(elapsed, resources, transferred)
+    logger.debug(f"Página cargada en {elapsed * 1000:.0f} ms: {url}")
+    return page_source
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCheckpoint:
+    """Estado persistente de una corrida de scraping para poder reanudarla con --resume <run-id>.
+
+    Cada corrida vive en <directorio>/<run-id>/: state.json guarda la lista de asignaturas, las
+    asignaturas ya recorridas y la frontera de profesores; records.jsonl acumula los registros
+    terminados, una línea por profesor.
+    """
+
+    def __init__(self, run_id=None, directory=".checkpoints"):
+        # Sufijo aleatorio: dos corridas en el mismo segundo (p. ej. trabajos seguidos del daemon) no comparten directorio
+        self.run_id = run_id or f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        self.path = Path(directory) / self.run_id
+        self.state_path = self.path / "state.json"
+        self.records_path = self.path / "records.jsonl"
+
+        self.subjects = None
+        self.done_subjects = set()
+        self.frontier_entries = []
+        self.completed = False
+        self.finished_ids = set()
+        self._records_file = None
+
+    @classmethod
+    def load(cls, run_id, directory=".checkpoints"):
+        """Carga una corrida existente"""
+        checkpoint = cls(run_id, directory)
+        if not checkpoint.state_path.exists():
+            raise FileNotFoundError(f"No existe el checkpoint de la corrida {run_id} en {checkpoint.path}")
+
+        with open(checkpoint.state_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        checkpoint.subjects = state.get("subjects")
+        checkpoint.done_subjects = set(state.get("done_subjects", []))
+        checkpoint.frontier_entries = state.get("frontier", [])
+        checkpoint.completed = state.get("completed", False)
+
+        # Solo los IDs quedan en memoria; los registros se releen del disco al emitirlos
+        for item in checkpoint._read_records():
+            checkpoint.finished_ids.add(item["id"])
+
+        logger.info(
+            f"Reanudando corrida {run_id}: {len(checkpoint.done_subjects)}/{len(checkpoint.subjects or [])} asignaturas recorridas, "
+            f"{len(checkpoint.finished_ids)} profesores terminados"
+        )
+        return checkpoint
+
+    def _read_records(self):
+        """Itera las líneas válidas de records.jsonl"""
+        if not self.records_path.exists():
+            return
+
+        with open(self.records_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Última línea truncada por una caída a media escritura
+                    logger.warning(f"Línea corrupta ignorada en {self.records_path}")
+
+    def save_state(self, frontier=None):
+        """Escribe state.json de forma atómica (archivo temporal + rename)"""
+        if frontier is not None:
+            self.frontier_entries = frontier.entries()
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        state = {
+            "run_id": self.run_id,
+            "updated_at": time.time(),
+            "subjects": self.subjects,
+            "done_subjects": sorted(self.done_subjects),
+            "frontier": self.frontier_entries,
+            "completed": self.completed,
+        }
+        tmp_path = self.state_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def set_subjects(self, subjects):
+        """Guarda la lista de asignaturas de la corrida"""
+        self.subjects = subjects
+        self.save_state()
+
+    def is_subject_done(self, subject_id):
+        return subject_id in self.done_subjects
+
+    def mark_subject_done(self, subject_id, frontier):
+        """Marca la página de grupos como recorrida junto con la frontera resultante"""
+        self.done_subjects.add(subject_id)
+        self.save_state(frontier)
+
+    def is_professor_done(self, professor_id):
+        return professor_id in self.finished_ids
+
+    def record_professor(self, professor_id, professor_data):
+        """Agrega un registro terminado al log de la corrida"""
+        if self._records_file is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._records_file = open(self.records_path, "a", encoding="utf-8")
+
+        self._records_file.write(json.dumps({"id": professor_id, "record": professor_data}, ensure_ascii=False) + "\n")
+        self._records_file.flush()
+        self.finished_ids.add(professor_id)
+
+    def finished_records(self, frontier):
+        """Itera pares (entrada de la frontera, registro) de los profesores terminados en corridas anteriores"""
+        entries = {entry["id"]: entry for entry in frontier.entries()}
+        for item in self._read_records():
+            if item["id"] in entries:
+                yield entries[item["id"]], item["record"]
+
+    def mark_completed(self):
+        """Marca la corrida como terminada"""
+        self.completed = True
+        self.save_state()
+
+    def close(self):
+        """Cierra el log de registros"""
+        if self._records_file is not None:
+            self._records_file.close()
+            self._records_file = None
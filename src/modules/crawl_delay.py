@@ -0,0 +1,147 @@
+import logging
+import re
+import threading
+import time
+
+import requests
+from selenium.common.exceptions import TimeoutException
+from urllib3.exceptions import MaxRetryError, ResponseError
+
+logger = logging.getLogger(__name__)
+
+# Cada tipo de página se sirve distinto (el índice y los grupos son más pesados que el directorio)
+URL_CLASSES = [
+    ("indice", re.compile(r"/docencia/horarios/indiceplan/")),
+    ("grupos", re.compile(r"/docencia/horarios/\d+/\d+/\d+")),
+    ("directorio", re.compile(r"/directorio/\d+")),
+]
+DEFAULT_CLASS = "otras"  # historiales y cualquier otra página
+
+
+def url_class(url):
+    for name, pattern in URL_CLASSES:
+        if pattern.search(url):
+            return name
+    return DEFAULT_CLASS
+
+
+def is_overload_error(error):
+    """Timeouts y respuestas 5xx: señales de que el servidor no da abasto"""
+    if isinstance(error, (TimeoutException, requests.Timeout)):
+        return True
+    # Al agotarse los reintentos de status_forcelist (502/503/504) requests lanza RetryError, sin response
+    if isinstance(error, requests.exceptions.RetryError):
+        return True
+    if isinstance(error, MaxRetryError) and isinstance(error.reason, ResponseError):
+        return True
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code >= 500
+
+
+class CrawlDelayController:
+    """Pausa entre peticiones que se adapta a cómo responde el servidor, por tipo de URL.
+
+    Cada respuesta sana (sin error y con latencia normal) reduce la pausa de su tipo multiplicándola
+    por decrease; un timeout, un 5xx o una respuesta lenta (más de slow_factor veces la latencia
+    promedio del tipo, o más de slow_latency segundos) la multiplica por backoff. La pausa siempre
+    queda entre min_delay y max_delay y empieza en base_delay. wait() solo espera lo que falte desde
+    que terminó la última petición, así el tiempo de parseo cuenta como parte de la pausa.
+    """
+
+    def __init__(self, base_delay=2.0, min_delay=0.2, max_delay=60.0, decrease=0.9, backoff=2.0, slow_factor=2.0, slow_latency=10.0, warmup=5):
+        self.base_delay = base_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.decrease = decrease
+        self.backoff = backoff
+        self.slow_factor = slow_factor
+        self.slow_latency = slow_latency
+        self.warmup = warmup
+        self._classes = {}
+        self._last_request_end = 0.0
+        self._lock = threading.Lock()
+
+    def _state(self, name):
+        state = self._classes.get(name)
+        if state is None:
+            state = {
+                "delay": min(max(self.base_delay, self.min_delay), self.max_delay),
+                "latency": None,
+                "requests": 0,
+                "errors": 0,
+                "overloads": 0,
+                "slow": 0,
+                "backoffs": 0,
+                "speedups": 0,
+                "waited": 0.0,
+            }
+            self._classes[name] = state
+        return state
+
+    def delay_for(self, url):
+        with self._lock:
+            return self._state(url_class(url))["delay"]
+
+    def wait(self, url):
+        """Espera la pausa del tipo de la URL, descontando el tiempo transcurrido desde la última petición"""
+        with self._lock:
+            state = self._state(url_class(url))
+            remaining = self._last_request_end + state["delay"] - time.monotonic()
+            if remaining > 0:
+                state["waited"] += remaining
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def observe(self, url, latency, error=None):
+        """Registra una petición terminada y ajusta la pausa de su tipo"""
+        name = url_class(url)
+        with self._lock:
+            self._last_request_end = time.monotonic()
+            state = self._state(name)
+            state["requests"] += 1
+            average = state["latency"]
+
+            if error is not None:
+                state["errors"] += 1
+                overloaded = is_overload_error(error)
+                if overloaded:
+                    state["overloads"] += 1
+                slow = False
+            else:
+                overloaded = False
+                slow = latency > self.slow_latency or (average is not None and state["requests"] > self.warmup and latency > self.slow_factor * average)
+                if slow:
+                    state["slow"] += 1
+                # Promedio móvil exponencial; las respuestas con error no cuentan
+                state["latency"] = latency if average is None else 0.8 * average + 0.2 * latency
+
+            previous = state["delay"]
+            if overloaded or slow:
+                state["delay"] = min(self.max_delay, previous * self.backoff)
+                state["backoffs"] += 1
+            elif error is None:
+                state["delay"] = max(self.min_delay, previous * self.decrease)
+                if state["delay"] < previous:
+                    state["speedups"] += 1
+
+        if state["delay"] > previous:
+            reason = "timeout/5xx" if overloaded else f"respuesta lenta ({latency:.1f} s)"
+            logger.warning(f"Servidor bajo carga en '{name}' ({reason}): pausa {previous:.2f} s -> {state['delay']:.2f} s")
+
+    def metrics(self):
+        """Por tipo de URL: peticiones, tasa de errores, latencia promedio, pausa actual y decisiones tomadas"""
+        with self._lock:
+            return {
+                name: {
+                    "requests": state["requests"],
+                    "error_rate": round(state["errors"] / state["requests"], 3) if state["requests"] else 0.0,
+                    "overloads": state["overloads"],
+                    "slow": state["slow"],
+                    "latency_ms": round(state["latency"] * 1000) if state["latency"] is not None else None,
+                    "delay_s": round(state["delay"], 2),
+                    "backoffs": state["backoffs"],
+                    "speedups": state["speedups"],
+                    "waited_s": round(state["waited"], 1),
+                }
+                for name, state in self._classes.items()
+            }
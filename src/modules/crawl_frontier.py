@@ -0,0 +1,41 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProfessorFrontier:
+    """Frontera del crawl indexada por el ID de /directorio/<id>: cada profesor se descarga una sola vez"""
+
+    def __init__(self, entries=None):
+        # Las entradas pueden venir de un checkpoint de una corrida anterior
+        self._entries = {entry["id"]: entry for entry in entries or []}
+
+    def add(self, professor, subject_name):
+        """Registra un profesor visto en una asignatura. Regresa True si es la primera vez que aparece"""
+        entry = self._entries.get(professor["id"])
+        if entry is None:
+            self._entries[professor["id"]] = {"id": professor["id"], "name": professor["name"], "url": professor["url"], "subjects": [subject_name]}
+            return True
+
+        if subject_name not in entry["subjects"]:
+            entry["subjects"].append(subject_name)
+        return False
+
+    def entries(self):
+        """Profesores pendientes en el orden en que fueron descubiertos"""
+        return list(self._entries.values())
+
+    def merge_subjects(self, professor_id, professor_data):
+        """Agrega a otherSubjects las asignaturas extra en las que apareció el profesor"""
+        entry = self._entries.get(professor_id)
+        if entry is None:
+            return professor_data
+
+        other_subjects = professor_data["otherSubjects"]
+        for subject_name in entry["subjects"]:
+            if subject_name != professor_data["subject"] and subject_name not in other_subjects:
+                other_subjects.append(subject_name)
+        return professor_data
+
+    def __len__(self):
+        return len(self._entries)
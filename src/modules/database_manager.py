@@ -1,19 +1,218 @@
 import logging
-from typing import Dict, List
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
-from pymongo import MongoClient
+from decouple import config
+from pymongo import ASCENDING, MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 
 from src.config.settings import MONGO_CONFIG
+from src.modules.rate_limiter import QuotaStore
 
 logger = logging.getLogger(__name__)
 
 
+class BulkWriter:
+    """Acumula operaciones de escritura y las envía en un solo bulk_write cada batch_size operaciones o flush_interval segundos.
+
+    Cada operación puede traer un callback on_written que se llama cuando su lote ya llegó a MongoDB.
+    """
+
+    def __init__(self, collection, batch_size: int = 100, flush_interval: float = 5.0, auto_flush: bool = False):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.upserted_count = 0
+        self.matched_count = 0
+        self.modified_count = 0
+        self.flush_count = 0
+        self._operations: List = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = None
+        if auto_flush:
+            # Vacía por tiempo aunque no lleguen operaciones nuevas
+            self._timer = threading.Thread(target=self._auto_flush, name="bulk-writer-flush", daemon=True)
+            self._timer.start()
+
+    def add(self, operation, on_written: Optional[Callable[[], None]] = None) -> None:
+        """Encola una operación y vacía el lote si se llenó o ya pasó el intervalo"""
+        with self._lock:
+            self._operations.append((operation, on_written))
+            if len(self._operations) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+                try:
+                    self._flush()
+                except PyMongoError as e:
+                    # El lote quedó en cola: se reintenta en el siguiente flush o en close()
+                    logger.error(f"Error en bulk_write, se reintentará: {str(e)}")
+
+    def flush(self) -> None:
+        """Envía las operaciones pendientes"""
+        with self._lock:
+            self._flush()
+
+    def _auto_flush(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            with self._lock:
+                if time.monotonic() - self._last_flush >= self.flush_interval:
+                    try:
+                        self._flush()
+                    except PyMongoError as e:
+                        logger.error(f"Error en bulk_write, se reintentará: {str(e)}")
+
+    def _flush(self) -> None:
+        operations, self._operations = self._operations, []
+        self._last_flush = time.monotonic()
+        if not operations:
+            return
+
+        try:
+            details = self._bulk_write([operation for operation, _ in operations])
+        except PyMongoError:
+            # Error transitorio (AutoReconnect, NetworkTimeout...): el lote regresa a la cola para el siguiente flush.
+            # Reaplicar las que sí llegaron no cambia nada: los upserts son idempotentes y los cambios de estado
+            # filtran por claimedBy, que ellos mismos borran
+            self._operations = operations + self._operations
+            raise
+
+        self.upserted_count += details.get("nUpserted", 0)
+        self.matched_count += details.get("nMatched", 0)
+        self.modified_count += details.get("nModified", 0)
+        self.flush_count += 1
+        logger.debug(f"bulk_write de {len(operations)} operaciones")
+        for _, on_written in operations:
+            if on_written is not None:
+                on_written()
+
+    def _bulk_write(self, operations: List) -> Dict:
+        """bulk_write desordenado; repite una vez las operaciones que chocaron con un índice único"""
+        try:
+            return self.collection.bulk_write(operations, ordered=False).bulk_api_result
+        except BulkWriteError as e:
+            # Con ordered=False el resto del lote sí se aplica
+            details = e.details
+
+        # Dos upserts con el mismo email en un lote (o en dos procesos a la vez): uno inserta y el otro
+        # falla con E11000. Repetido, el filtro ya encuentra el documento y se aplica como actualización
+        errors = details.get("writeErrors", [])
+        duplicates = [operations[error["index"]] for error in errors if error.get("code") == 11000]
+        if duplicates:
+            errors = [error for error in errors if error.get("code") != 11000]
+            try:
+                retried = self.collection.bulk_write(duplicates, ordered=False).bulk_api_result
+            except BulkWriteError as e:
+                retried = e.details
+                errors += retried.get("writeErrors", [])
+            for key in ("nUpserted", "nMatched", "nModified"):
+                details[key] = details.get(key, 0) + retried.get(key, 0)
+
+        if errors:
+            logger.error(f"{len(errors)} operaciones fallaron en bulk_write: {errors[:3]}")
+        return details
+
+    def close(self) -> None:
+        """Vacía lo pendiente al terminar; si MongoDB sigue fallando, lanza el error en lugar de perder el lote"""
+        self._closed.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class LeaseKeeper:
+    """Renueva los leases de los profesores reclamados por worker_id mientras siguen sin resolverse.
+
+    Un profesor reclamado puede pasar mucho tiempo en la cola de los workers o esperando un token
+    de envío (con la cuota por hora casi agotada o tras un throttling). Cada renew_interval
+    segundos (un tercio del lease) se extiende leaseExpiresAt de todos los que se tienen, así el
+    lease solo vence si el proceso deja de renovarlo (murió o se colgó) y ningún otro proceso, ni
+    este mismo, puede reclamar de nuevo un profesor que todavía está por enviarse.
+    """
+
+    def __init__(self, collection, worker_id: str, lease_seconds: float, renew_interval: Optional[float] = None):
+        self.collection = collection
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.renew_interval = renew_interval or lease_seconds / 3
+        self.renewals = 0
+        self._held = set()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+        self._thread.start()
+
+    def hold(self, professor_id) -> None:
+        with self._lock:
+            self._held.add(professor_id)
+
+    def release(self, professor_id) -> None:
+        with self._lock:
+            self._held.discard(professor_id)
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.renew_interval):
+            try:
+                self.renew()
+            except Exception as e:
+                logger.error(f"Error renovando leases: {str(e)}")
+
+    def renew(self) -> int:
+        """Extiende el lease de los profesores que se tienen. Regresa cuántos se renovaron"""
+        with self._lock:
+            held = list(self._held)
+        if not held:
+            return 0
+
+        result = self.collection.update_many(
+            {"_id": {"$in": held}, "sendStatus": "claimed", "claimedBy": self.worker_id},
+            {"$set": {"leaseExpiresAt": datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)}},
+        )
+        self.renewals += 1
+        # Los que no coinciden ya se resolvieron y su estado está en el BulkWriter, o alguien reseteó la cola
+        if result.matched_count < len(held):
+            logger.debug(f"{len(held) - result.matched_count} de {len(held)} leases ya no están reclamados por {self.worker_id}")
+        return result.modified_count
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
 class DatabaseManager:
-    def __init__(self):
+    # Esquema de índices de la colección de profesores: (campos, opciones)
+    INDEXES = [
+        # Deduplicación por email garantizada por la base de datos
+        ([("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+        # Solo los profesores pendientes de email: lo que consulta send_emails
+        ([("wasEmailSend", ASCENDING)], {"name": "pending_emails", "partialFilterExpression": {"wasEmailSend": False}}),
+        # Cola de envío: reclamos por estado y búsqueda de leases vencidos
+        ([("sendStatus", ASCENDING), ("leaseExpiresAt", ASCENDING)], {"name": "send_queue", "partialFilterExpression": {"wasEmailSend": False}}),
+        # Modo incremental y asociaciones de asignaturas
+        ([("scrapedAt", ASCENDING)], {"name": "scraped_at"}),
+        ([("sourceUrl", ASCENDING)], {"name": "source_url"}),
+    ]
+
+    def __init__(self, ensure_indexes=True):
         self.client = None
         self.db = None
         self.collection = None
         self._connect()
+        if ensure_indexes:
+            self.ensure_indexes()
 
     def _connect(self):
         """Establece conexión con MongoDB"""
@@ -31,51 +230,251 @@ class DatabaseManager:
             logger.error(f"Error conectando a MongoDB: {str(e)}")
             raise
 
-    def save_professors(self, professors: List[Dict]):
-        """Guarda profesores en la base de datos, actualizando si ya existen"""
-        saved_count = 0
-        updated_count = 0
+    def ensure_indexes(self) -> Dict[str, bool]:
+        """Crea los índices del esquema que falten. Regresa nombre -> si quedó creado"""
+        status = {}
 
-        for professor in professors:
+        for keys, options in self.INDEXES:
             try:
-                # Buscar si ya existe por email
-                existing = self.collection.find_one({"email": professor["email"]})
+                self.collection.create_index(keys, **options)
+                status[options["name"]] = True
+            except OperationFailure as e:
+                status[options["name"]] = False
+                if e.code == 11000:
+                    logger.error(f"No se pudo crear {options['name']}: hay emails duplicados en la colección, elimínalos primero")
+                else:
+                    logger.error(f"No se pudo crear el índice {options['name']}: {str(e)}")
+
+        logger.info(f"Índices verificados: {', '.join(name for name, ok in status.items() if ok)}")
+        return status
+
+    def save_professors(self, professors: Iterable[Dict], batch_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        """Guarda profesores conforme llegan con upserts por email agrupados en bulk_write.
+
+        No hay lectura previa: las materias se combinan con $setUnion, isComplexAnalysis y scrapedAt
+        con $max, y el resto de los campos solo se escriben al insertar.
+        """
+        writer = self.bulk_writer(batch_size, flush_interval)
+
+        try:
+            for professor in professors:
+                try:
+                    writer.add(self._professor_upsert(professor))
+                except Exception as e:
+                    logger.error(f"Error guardando {professor.get('name')}: {str(e)}")
+        finally:
+            writer.close()
+
+        return {"saved": writer.upserted_count, "updated": writer.matched_count}
+
+    def _professor_upsert(self, professor: Dict) -> UpdateOne:
+        """Operación de upsert de un profesor identificado por email.
+
+        Pipeline de actualización, como add_subject_associations: la materia con la que se extrajo se
+        une a otherSubjects salvo que sea la materia principal guardada, y los demás campos toman el
+        valor del registro solo si el documento no lo tiene (es decir, al insertar).
+        """
+        subject = professor["subject"]
+        subjects = list(professor.get("otherSubjects", [])) + [subject]
+
+        def if_missing(field, value):
+            return {"$ifNull": [f"${field}", {"$literal": value}]}
+
+        return UpdateOne(
+            {"email": professor["email"]},
+            [
+                {
+                    "$set": {
+                        "name": if_missing("name", professor["name"]),
+                        "subject": if_missing("subject", subject),
+                        "infoAboutPersonalWork": if_missing("infoAboutPersonalWork", professor.get("infoAboutPersonalWork", "")),
+                        "wasEmailSend": if_missing("wasEmailSend", professor.get("wasEmailSend", False)),
+                        "sourceUrl": if_missing("sourceUrl", professor.get("sourceUrl")),
+                        "otherSubjects": {
+                            "$setUnion": [
+                                {"$ifNull": ["$otherSubjects", []]},
+                                {"$setDifference": [{"$literal": subjects}, [if_missing("subject", subject)]]},
+                            ]
+                        },
+                        "isComplexAnalysis": {"$max": ["$isComplexAnalysis", {"$literal": professor.get("isComplexAnalysis", False)}]},
+                        "scrapedAt": {"$max": ["$scrapedAt", {"$literal": professor.get("scrapedAt", 0)}]},
+                    }
+                }
+            ],
+            upsert=True,
+        )
+
+    def bulk_writer(self, batch_size: Optional[int] = None, flush_interval: Optional[float] = None, auto_flush: bool = False) -> "BulkWriter":
+        """Crea un BulkWriter sobre la colección con el tamaño de lote y el intervalo configurados"""
+        return BulkWriter(
+            self.collection,
+            batch_size=batch_size or config("MONGO_BATCH_SIZE", default=100, cast=int),
+            flush_interval=flush_interval or config("MONGO_FLUSH_INTERVAL", default=5.0, cast=float),
+            auto_flush=auto_flush,
+        )
+
+    def lease_keeper(self, worker_id: str, lease_seconds: float) -> "LeaseKeeper":
+        """Crea un LeaseKeeper que renueva los reclamos de worker_id en la colección"""
+        return LeaseKeeper(self.collection, worker_id, lease_seconds)
+
+    def quota_store(self) -> QuotaStore:
+        """Contadores de envío por hora y por día en su propia colección, compartidos por todos los procesos"""
+        collection = self.db[config("MONGO_QUOTA_COLLECTION", default="sendQuota")]
+        return QuotaStore(collection)
+
+    # Campos que necesita la plantilla del mensaje
+    MESSAGE_PROJECTION = {"name": 1, "email": 1, "subject": 1, "otherSubjects": 1, "sendAttempts": 1}
 
-                if existing:
-                    # Actualizar: combinar las materias
-                    existing_subjects = set(existing.get("otherSubjects", []))
-                    new_subjects = set(professor.get("otherSubjects", []))
+    @staticmethod
+    def _claimable_filter(max_attempts: int, now: datetime, failed_before: Optional[datetime] = None) -> Dict:
+        """Profesores que se pueden reclamar: pendientes, fallidos con intentos restantes o con el lease vencido.
 
-                    # Si la materia actual no está en las otras materias, agregarla
-                    current_subject = professor.get("subject")
-                    if current_subject and current_subject not in existing_subjects and current_subject != existing.get("subject"):
-                        new_subjects.add(current_subject)
+        Con failed_before, los fallidos solo cuentan si fallaron antes de esa fecha (en una corrida anterior).
+        """
+        failed = {"sendStatus": "failed"}
+        if failed_before is not None:
+            failed["failedAt"] = {"$not": {"$gte": failed_before}}
+        return {
+            "wasEmailSend": False,
+            "sendAttempts": {"$not": {"$gte": max_attempts}},
+            "$or": [
+                {"sendStatus": {"$in": [None, "pending"]}},
+                failed,
+                {"sendStatus": "claimed", "leaseExpiresAt": {"$lt": now}},
+            ],
+        }
 
-                    # Combinar todas las materias
-                    all_subjects = existing_subjects.union(new_subjects)
+    def _claim(self, query: Dict, worker_id: str, lease_seconds: float, now: datetime) -> Optional[Dict]:
+        return self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {"sendStatus": "claimed", "claimedBy": worker_id, "leaseExpiresAt": now + timedelta(seconds=lease_seconds)},
+                "$inc": {"sendAttempts": 1},
+            },
+            projection=self.MESSAGE_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
 
-                    # Actualizar el documento
-                    self.collection.update_one(
-                        {"_id": existing["_id"]},
+    def claim_pending_professors(self, worker_id: str, lease_seconds: float = 300.0, max_attempts: int = 3) -> Iterator[Dict]:
+        """Reclama profesores para enviar, uno por find_one_and_update, conforme el consumidor los pide.
+
+        Estados de sendStatus: pending (o sin campo) -> claimed -> sent | failed. Un documento se puede
+        reclamar si está pendiente, si falló en una corrida anterior con menos de max_attempts intentos
+        o si su lease venció (el proceso que lo tenía murió). Lo que falla durante esta corrida no se
+        vuelve a intentar en ella, así un rechazo permanente no gasta cuota varias veces seguidas. El
+        reclamo es atómico, así que varios procesos pueden consumir la misma colección sin tomar el
+        mismo profesor a la vez.
+        """
+        run_started = datetime.now(timezone.utc)
+        while True:
+            now = datetime.now(timezone.utc)
+            professor = self._claim(self._claimable_filter(max_attempts, now, failed_before=run_started), worker_id, lease_seconds, now)
+            if professor is None:
+                return
+            yield professor
+
+    def claim_professor(self, professor_id, worker_id: str, lease_seconds: float = 300.0, max_attempts: int = 3) -> Optional[Dict]:
+        """Reclama un profesor concreto (p. ej. el de un mensaje del outbox). None si no está disponible"""
+        now = datetime.now(timezone.utc)
+        return self._claim({"_id": professor_id, **self._claimable_filter(max_attempts, now)}, worker_id, lease_seconds, now)
+
+    def iter_pending_professors(self, max_attempts: int = 3) -> Iterable[Dict]:
+        """Cursor sobre los profesores que se podrían reclamar, sin reclamarlos, con solo los campos de la plantilla"""
+        query = self._claimable_filter(max_attempts, datetime.now(timezone.utc))
+        return self.collection.find(query, self.MESSAGE_PROJECTION).batch_size(100)
+
+    def is_email_sent(self, professor_id) -> bool:
+        return self.collection.count_documents({"_id": professor_id, "wasEmailSend": True}, limit=1) > 0
+
+    @staticmethod
+    def email_sent_operation(professor_id, worker_id: str) -> UpdateOne:
+        """Operación que marca el email como enviado si el reclamo sigue siendo de worker_id, para un BulkWriter"""
+        return UpdateOne(
+            {"_id": professor_id, "claimedBy": worker_id},
+            {
+                "$set": {"sendStatus": "sent", "wasEmailSend": True, "sentAt": datetime.now(timezone.utc)},
+                "$unset": {"claimedBy": "", "leaseExpiresAt": ""},
+            },
+        )
+
+    @staticmethod
+    def email_failed_operation(professor_id, worker_id: str, error: str) -> UpdateOne:
+        """Operación que marca el envío como fallido; se reintenta en otra corrida (ver failed_before) hasta max_attempts"""
+        return UpdateOne(
+            {"_id": professor_id, "claimedBy": worker_id},
+            {
+                "$set": {"sendStatus": "failed", "lastError": error[:500], "failedAt": datetime.now(timezone.utc)},
+                "$unset": {"claimedBy": "", "leaseExpiresAt": ""},
+            },
+        )
+
+    @staticmethod
+    def release_claim_operation(professor_id, worker_id: str) -> UpdateOne:
+        """Operación que devuelve a pending un profesor reclamado que no se llegó a intentar"""
+        return UpdateOne(
+            {"_id": professor_id, "claimedBy": worker_id},
+            {"$set": {"sendStatus": "pending"}, "$inc": {"sendAttempts": -1}, "$unset": {"claimedBy": "", "leaseExpiresAt": ""}},
+        )
+
+    def reset_send_status(self) -> int:
+        """Regresa todos los profesores a pending y limpia reclamos e intentos. Regresa los documentos modificados"""
+        result = self.collection.update_many(
+            {},
+            {
+                "$set": {"wasEmailSend": False, "sendStatus": "pending", "sendAttempts": 0},
+                "$unset": {"claimedBy": "", "leaseExpiresAt": "", "sentAt": "", "lastError": "", "failedAt": ""},
+            },
+        )
+        return result.modified_count
+
+    def email_status_summary(self) -> Dict:
+        """Conteo de documentos por estado de wasEmailSend y de sendStatus calculado en el servidor"""
+        pipeline = [{"$group": {"_id": {"$ifNull": ["$wasEmailSend", "missing"]}, "count": {"$sum": 1}}}]
+        counts = {str(doc["_id"]): doc["count"] for doc in self.collection.aggregate(pipeline)}
+        pipeline = [{"$match": {"sendStatus": {"$in": ["claimed", "failed"]}}}, {"$group": {"_id": "$sendStatus", "count": {"$sum": 1}}}]
+        statuses = {doc["_id"]: doc["count"] for doc in self.collection.aggregate(pipeline)}
+        return {
+            "total": sum(counts.values()),
+            "sent": counts.get("True", 0),
+            "pending": counts.get("False", 0),
+            "missing": counts.get("missing", 0),
+            "claimed": statuses.get("claimed", 0),
+            "failed": statuses.get("failed", 0),
+        }
+
+    def get_scraped_index(self) -> Dict[str, float]:
+        """Regresa el mapa sourceUrl -> scrapedAt de todos los profesores en una sola consulta"""
+        cursor = self.collection.find({"sourceUrl": {"$exists": True}}, {"_id": 0, "sourceUrl": 1, "scrapedAt": 1})
+        index = {doc["sourceUrl"]: doc.get("scrapedAt", 0) for doc in cursor}
+        logger.info(f"Índice de scraping cargado: {len(index)} profesores conocidos")
+        return index
+
+    def add_subject_associations(self, associations: List[Dict]):
+        """Agrega asignaturas a otherSubjects de profesores existentes (identificados por sourceUrl)"""
+        writer = self.bulk_writer()
+
+        for association in associations:
+            # Pipeline de actualización: une las asignaturas sin repetir la materia principal
+            writer.add(
+                UpdateOne(
+                    {"sourceUrl": association["sourceUrl"]},
+                    [
                         {
                             "$set": {
-                                "otherSubjects": list(all_subjects),
-                                "isComplexAnalysis": professor.get("isComplexAnalysis", False) or existing.get("isComplexAnalysis", False),
+                                "otherSubjects": {
+                                    "$setUnion": [
+                                        {"$ifNull": ["$otherSubjects", []]},
+                                        {"$setDifference": [association["subjects"], [{"$ifNull": ["$subject", ""]}]]},
+                                    ]
+                                }
                             }
-                        },
-                    )
-                    updated_count += 1
-                    logger.info(f"Actualizado: {professor['name']}")
-                else:
-                    # Insertar nuevo profesor
-                    self.collection.insert_one(professor)
-                    saved_count += 1
-                    logger.info(f"Guardado: {professor['name']}")
-
-            except Exception as e:
-                logger.error(f"Error guardando {professor['name']}: {str(e)}")
+                        }
+                    ],
+                )
+            )
+        writer.close()
 
-        return {"saved": saved_count, "updated": updated_count}
+        return {"updated": writer.modified_count}
 
     def close(self):
         """Cierra la conexión a MongoDB"""
@@ -1,8 +1,12 @@
+import base64
 import logging
 import random
 import smtplib
+import ssl
+from email.header import Header
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
 from typing import Dict, Optional
 
 from src.config.settings import EMAIL_CONFIG, PHONE_NUMBER
@@ -10,18 +14,77 @@ from src.config.settings import EMAIL_CONFIG, PHONE_NUMBER
 from .template_loader import TemplateLoader
 
 
+class MessageBuilder:
+    """Builds wire-ready single-part text/plain messages without going through email.message objects.
+
+    Everything shared by the campaign (From, the RFC 2047-encoded Subject and the MIME headers) is
+    serialized once; per recipient only To, Date, Message-ID and the base64 body are produced.
+    """
+
+    def __init__(self, sender: str, subject: str) -> None:
+        self.sender = sender
+        self.subject = subject
+        # Message-ID domain taken from the sender, so make_msgid never resolves the local FQDN
+        self._msgid_domain = sender.rpartition("@")[2] or "localhost"
+        self._from = b"From: " + sender.encode("utf-8") + b"\r\n"
+        encoded_subject = subject if subject.isascii() else Header(subject, "utf-8").encode(linesep="\r\n")
+        self._shared_headers = "".join(
+            (
+                f"Subject: {encoded_subject}\r\n",
+                "MIME-Version: 1.0\r\n",
+                'Content-Type: text/plain; charset="utf-8"\r\n',
+                "Content-Transfer-Encoding: base64\r\n",
+                "\r\n",
+            )
+        ).encode("ascii")
+
+    def build(self, to: str, body: str) -> bytes:
+        """RFC 5322 message bytes (CRLF line endings) ready for sendmail"""
+        return b"".join(
+            (
+                self._from,
+                b"To: ",
+                to.encode("utf-8"),
+                b"\r\nDate: ",
+                formatdate(localtime=True).encode("ascii"),
+                b"\r\nMessage-ID: ",
+                make_msgid(domain=self._msgid_domain).encode("ascii"),
+                b"\r\n",
+                self._shared_headers,
+                base64.encodebytes(body.encode("utf-8")).replace(b"\n", b"\r\n"),
+            )
+        )
+
+
 class EmailSender:
+    # Variables que _create_email_message pasa a la plantilla del mensaje
+    TEMPLATE_PLACEHOLDERS = ("name", "subjects", "phone_number")
+
     def __init__(self) -> None:
         self.smtp_config: Dict = EMAIL_CONFIG
-        self.template_loader: TemplateLoader = TemplateLoader()
+        self.template_loader: TemplateLoader = TemplateLoader(placeholders=self.TEMPLATE_PLACEHOLDERS)
         self.logger: logging.Logger = logging.getLogger(__name__)
         self.server: Optional[smtplib.SMTP_SSL] = None
         self.phone_number: str = PHONE_NUMBER
+        self._builder: Optional[MessageBuilder] = None
+
+        # Cargar y validar las plantillas antes de abrir cualquier conexión SMTP
+        self.template_loader.load_template()
+        self.template_loader.load_subject_template()
+
+    def _connect_smtp(self, account: Optional[Dict] = None) -> smtplib.SMTP:
+        """Creates and returns a new SMTP SSL connection, for the given account or the default one"""
+        account = account or self.smtp_config
+        security = account.get("security", "ssl")
+        context = ssl.create_default_context(cafile=account.get("ca_file"))
 
-    def _connect_smtp(self) -> smtplib.SMTP_SSL:
-        """Creates and returns a new SMTP SSL connection"""
-        server = smtplib.SMTP_SSL(self.smtp_config["server"], self.smtp_config["port"])
-        server.login(self.smtp_config["user"], self.smtp_config["password"])
+        if security == "ssl":
+            server = smtplib.SMTP_SSL(account["server"], account["port"], context=context)
+        else:
+            server = smtplib.SMTP(account["server"], account["port"])
+            if security == "starttls":
+                server.starttls(context=context)
+        server.login(account["user"], account["password"])
         return server
 
     def connect(self) -> smtplib.SMTP_SSL:
@@ -57,34 +120,50 @@ class EmailSender:
         return ", ".join(all_subjects)
 
     def _create_email_message(self, teacher_data: Dict) -> MIMEMultipart:
-        """Creates and returns an email message with the appropriate content"""
+        """Creates and returns the email as a MIMEMultipart object (render_message builds the same content as bytes)"""
         msg = MIMEMultipart()
         msg["From"] = self.smtp_config["user"]
         msg["To"] = teacher_data["email"]
 
-        template = self.template_loader.load_template()
-        subject_template = self.template_loader.load_subject_template()
-
         # El asunto ahora es fijo, no necesita sustitución
-        msg["Subject"] = subject_template.template
+        msg["Subject"] = self.template_loader.load_subject_template().template
 
-        # Formatear los subjects según la nueva lógica
-        subjects_str = self._format_subjects(teacher_data)
+        msg.attach(MIMEText(self._render_body(teacher_data), "plain"))
+        return msg
 
-        body = template.substitute(
+    def _render_body(self, teacher_data: Dict) -> str:
+        return self.template_loader.load_template().substitute(
             name=teacher_data["name"],
-            subjects=subjects_str,
+            subjects=self._format_subjects(teacher_data),
             phone_number=self.phone_number,
         )
-        msg.attach(MIMEText(body, "plain"))
-        return msg
+
+    def message_builder(self) -> MessageBuilder:
+        """MessageBuilder for the current subject; rebuilt only if the subject template changed"""
+        subject = self.template_loader.load_subject_template().template
+        builder = self._builder
+        if builder is None or builder.subject != subject:
+            builder = self._builder = MessageBuilder(self.smtp_config["user"], subject)
+        return builder
+
+    def render_message(self, teacher_data: Dict) -> bytes:
+        """Serializes the email message as RFC 5322 bytes (CRLF line endings), ready for sendmail"""
+        return self.message_builder().build(teacher_data["email"], self._render_body(teacher_data))
+
+    @staticmethod
+    def with_sender(raw_message: bytes, sender: str) -> bytes:
+        """Rewrites the From header of a serialized message, leaving every other byte untouched"""
+        head, separator, body = raw_message.partition(b"\r\n\r\n")
+        from_line = b"From: " + sender.encode("utf-8")
+        lines = [from_line if line.startswith(b"From: ") else line for line in head.split(b"\r\n")]
+        return b"\r\n".join(lines) + separator + body
 
     def send_email(self, teacher_data: Dict, use_existing_connection: bool = False) -> None:
         """Sends an email to the specified teacher"""
-        msg = self._create_email_message(teacher_data)
+        raw_message = self.render_message(teacher_data)
 
         if use_existing_connection and self.server is not None:
-            self.server.send_message(msg)
+            self.server.sendmail(self.smtp_config["user"], [teacher_data["email"]], raw_message)
         else:
             with self._connect_smtp() as server:
-                server.send_message(msg)
+                server.sendmail(self.smtp_config["user"], [teacher_data["email"]], raw_message)
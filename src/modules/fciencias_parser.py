@@ -0,0 +1,204 @@
+import logging
+import re
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+COMPLEX_ANALYSIS_KEYWORDS = ["Variable Compleja I", "Variable Compleja II", "Variable Compleja", "Análisis Complejo", "Funciones Complejas"]
+
+# Backend de BeautifulSoup para todas las páginas (lxml es varias veces más rápido que html.parser)
+PARSER = "lxml"
+# Todo lo que se extrae está dentro de este contenedor; el menú, la cabecera y el pie se descartan al parsear
+CONTENT_STRAINER = SoupStrainer(id="info-contenido")
+
+SUBJECT_LINK_RE = re.compile(r"/docencia/horarios/20261/217/\d+")
+PROFESSOR_LINK_RE = re.compile(r"/directorio/\d+")
+DETAILS_LINK_RE = re.compile(r"/docencia/horarios/detalles/\d+")
+MAILTO_RE = re.compile(r"^mailto:")
+TRAILING_ID_RE = re.compile(r"/(\d+)$")
+GROUP_COUNT_RE = re.compile(r",\s*\d+\s*grupos?")
+ROLE_SUFFIX_RE = re.compile(r",\s*(Profesor|Ayudante).*$")
+PROFESSOR_SUFFIX_RE = re.compile(r",\s*Profesor.*$")
+ALL_GROUPS_RE = re.compile(r"Ver todos los grupos")
+TEACHING_RE = re.compile("Enseñanza")
+
+
+def make_soup(html):
+    """Parsea solo el contenido de la página (#info-contenido); si no existe, el documento completo"""
+    soup = BeautifulSoup(html, PARSER, parse_only=CONTENT_STRAINER)
+    if soup.find(True) is None:
+        soup = BeautifulSoup(html, PARSER)
+    return soup
+
+
+def parse_subjects(soup, base_url):
+    """Asignaturas del índice del plan: nombre, URL absoluta e id"""
+    subject_links = []
+
+    # Encontrar todos los enlaces de asignaturas
+    links = soup.find_all("a", href=SUBJECT_LINK_RE)
+    for link in links:
+        subject_name = link.get_text().strip()
+        # Limpiar el nombre (remover "X grupos")
+        subject_name = GROUP_COUNT_RE.sub("", subject_name)
+        href = link["href"]
+        subject_id = TRAILING_ID_RE.search(href).group(1)
+
+        subject_links.append({"name": subject_name, "url": f"{base_url}{href}", "id": subject_id})
+
+    logger.info(f"Encontradas {len(subject_links)} asignaturas")
+    return subject_links
+
+
+def parse_professors_from_subject(soup, subject_name, base_url):
+    """Extrae los enlaces a profesores de la página de grupos de una asignatura"""
+    professor_links = []
+
+    # ESTRATEGIA MEJORADA: Buscar por estructura de tabla específica
+    tables = soup.find_all("table")
+    for table in tables:
+        rows = table.find_all("tr")
+        for row in rows:
+            cells = row.find_all("td")
+            if len(cells) >= 2:
+                first_cell_text = cells[0].get_text().strip()
+                if first_cell_text == "Profesor":
+                    professor_link = cells[1].find("a", href=PROFESSOR_LINK_RE)
+                    if professor_link:
+                        professor_name = professor_link.get_text().strip()
+                        href = professor_link["href"]
+                        professor_id = TRAILING_ID_RE.search(href).group(1)
+
+                        professor_links.append({"name": professor_name, "url": f"{base_url}{href}", "id": professor_id, "source_subject": subject_name})
+                        break
+
+    logger.info(f"Encontrados {len(professor_links)} profesores en {subject_name}")
+    return professor_links
+
+
+def parse_name_and_email(soup):
+    """Nombre (primer h1) y primer email (enlace mailto:) de la página del directorio"""
+    name_element = soup.find("h1")
+    name = name_element.get_text().strip() if name_element else ""
+
+    email = ""
+    email_elements = soup.find_all("a", href=MAILTO_RE)
+    for email_element in email_elements:
+        email = email_element["href"].replace("mailto:", "").strip()
+        if email:
+            break
+
+    return name, email
+
+
+def build_professor(name, email, professor_url, source_subject, all_subjects):
+    """Documento del profesor tal como se guarda en MongoDB"""
+    professor_data = {
+        "name": name,
+        "email": email,
+        "subject": source_subject,
+        "otherSubjects": [s for s in all_subjects if s != source_subject],
+        "infoAboutPersonalWork": "",
+        "isComplexAnalysis": is_complex_analysis(all_subjects),
+        "wasEmailSend": False,
+        "sourceUrl": professor_url,
+        "scrapedAt": time.time(),
+    }
+
+    if email:
+        logger.info(f"Datos extraídos para: {name} - {email}")
+    else:
+        logger.warning(f"Profesor sin email: {name}")
+
+    return professor_data
+
+
+def parse_professor(soup, professor_url, source_subject, all_subjects):
+    """Arma el documento del profesor a partir de su página del directorio"""
+    name, email = parse_name_and_email(soup)
+    return build_professor(name, email, professor_url, source_subject, all_subjects)
+
+
+def find_all_groups_url(soup, base_url):
+    """Regresa la URL absoluta del enlace "Ver todos los grupos", o None si no existe"""
+    all_groups_link = soup.find("a", string=ALL_GROUPS_RE)
+
+    if all_groups_link and all_groups_link.get("href"):
+        groups_url = all_groups_link["href"]
+        if not groups_url.startswith("http"):
+            groups_url = f"{base_url}{groups_url}"
+        return groups_url
+    return None
+
+
+def parse_history_subjects(historical_soup):
+    """Extrae las asignaturas únicas de la página del historial completo"""
+    subjects = []
+
+    subject_links = historical_soup.find_all("a", href=DETAILS_LINK_RE)
+
+    for link in subject_links:
+        link_text = link.get_text().strip()
+        # Limpiar el texto: remover ", Profesor", ", Ayudante" y cualquier rol similar
+        subject_name = ROLE_SUFFIX_RE.sub("", link_text).strip()
+
+        if subject_name and subject_name not in subjects:
+            subjects.append(subject_name)
+
+    logger.info(f"Extraídas {len(subjects)} asignaturas únicas del historial completo")
+    return subjects
+
+
+def parse_subjects_fallback(soup):
+    """Método de respaldo para extraer materias de la sección de Enseñanza (comportamiento original)"""
+    subjects = []
+
+    enseñanza_headers = soup.find_all(["h2", "h3"], string=TEACHING_RE)
+
+    for header in enseñanza_headers:
+        current_element = header.find_next_sibling()
+        while current_element and current_element.name not in ["h1", "h2", "h3"]:
+            if current_element.name == "div":
+                subject_links = current_element.find_all("a", href=DETAILS_LINK_RE)
+
+                for link in subject_links:
+                    link_text = link.get_text().strip()
+                    subject_name = PROFESSOR_SUFFIX_RE.sub("", link_text).strip()
+                    if subject_name and subject_name not in subjects:
+                        subjects.append(subject_name)
+
+            current_element = current_element.find_next_sibling()
+
+    return list(set(subjects))
+
+
+def is_complex_analysis(subjects):
+    """Determina si el profesor imparte Análisis Complejo"""
+    for subject in subjects:
+        if any(keyword.lower() in subject.lower() for keyword in COMPLEX_ANALYSIS_KEYWORDS):
+            return True
+    return False
+
+
+# Variantes sobre HTML crudo: funciones de módulo que se pueden mandar a los procesos de ParserPool
+
+
+def extract_subjects(html, base_url):
+    return parse_subjects(make_soup(html), base_url)
+
+
+def extract_professors_from_subject(html, subject_name, base_url):
+    return parse_professors_from_subject(make_soup(html), subject_name, base_url)
+
+
+def extract_directory_page(html, base_url):
+    """Todo lo que hace falta de la página del directorio: nombre, email, enlace al historial y materias de respaldo"""
+    soup = make_soup(html)
+    name, email = parse_name_and_email(soup)
+    return {"name": name, "email": email, "allGroupsUrl": find_all_groups_url(soup, base_url), "fallbackSubjects": parse_subjects_fallback(soup)}
+
+
+def extract_history_subjects(html):
+    return parse_history_subjects(make_soup(html))
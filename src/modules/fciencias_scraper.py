@@ -1,9 +1,13 @@
 import logging
-import re
+import os
+import queue
+import shutil
+import threading
 import time
+from collections import deque
+from concurrent.futures import Future
 
 import requests
-from bs4 import BeautifulSoup
 from decouple import config
 from selenium import webdriver
 from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
@@ -11,43 +15,95 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from . import fciencias_parser
+from .async_crawler import AsyncCrawler
+from .browser_pool import COOKIE_FIELDS, BrowserPool
+from .browser_profile import BLOCKED_URL_PATTERNS, PageLoadStats, apply_lean_options, block_requests, load_page, quit_driver
+from .crawl_checkpoint import CrawlCheckpoint
+from .crawl_delay import CrawlDelayController
+from .crawl_frontier import ProfessorFrontier
+from .http_fetcher import USER_AGENT, HttpFetcher
+from .page_cache import PageCache
+from .parser_pool import ParserPool
+from .session_store import SessionStore
+
 logger = logging.getLogger(__name__)
 
 
 class FcienciasScraper:
-    def __init__(self, headless=True):
+    BACKENDS = ("selenium", "http")
+
+    def __init__(
+        self,
+        headless=True,
+        backend=None,
+        max_concurrency=None,
+        rate_limit=None,
+        use_cache=True,
+        refresh_patterns=None,
+        parse_workers=None,
+        browsers=None,
+        lean_browser=None,
+        reuse_session=True,
+    ):
         self.base_url = config("FCIENCIAS_BASE_URL")
         self.username = config("FCIENCIAS_USERNAME")
         self.password = config("FCIENCIAS_PASSWORD")
         self.wait_timeout = config("WAIT_TIMEOUT", default=30, cast=int)  # Aumentado a 30 segundos
         self.headless = headless
+        self.backend = backend or config("SCRAPER_BACKEND", default="selenium")
+        if self.backend not in self.BACKENDS:
+            raise ValueError(f"Backend de scraping desconocido: {self.backend}")
         self.driver = None
         self.wait = None
+        self.http_fetcher = None
+        # La concurrencia solo aplica al backend HTTP (Selenium usa un navegador por descarga en vuelo);
+        # el límite de tasa por host acota tanto el crawl HTTP concurrente como el pool de navegadores completo
+        self.max_concurrency = max_concurrency or config("CRAWL_CONCURRENCY", default=8, cast=int)
+        self.rate_limit = rate_limit or config("CRAWL_RATE_LIMIT", default=2.0, cast=float)
+        self._driver_lock = threading.Lock()
+        # Con backend selenium y más de un navegador, el crawl reparte las páginas entre un pool de Chrome con la misma sesión
+        self.browsers = browsers or config("BROWSER_POOL_SIZE", default=1, cast=int)
+        self.browser_max_memory_mb = config("BROWSER_MAX_MEMORY_MB", default=1500, cast=int)
+        self.browser_pool = None
+        # Perfil ligero: carga eager, sin imágenes/CSS/fuentes/scripts de terceros y con un perfil temporal por navegador
+        self.lean_browser = config("BROWSER_LEAN", default=False, cast=bool) if lean_browser is None else lean_browser
+        self.browser_profile_dir = config("BROWSER_PROFILE_DIR", default=".browser-profile")
+        extra_patterns = config("BROWSER_BLOCKED_URLS", default="")
+        self.blocked_url_patterns = BLOCKED_URL_PATTERNS + [pattern.strip() for pattern in extra_patterns.split(",") if pattern.strip()]
+        self.page_stats = PageLoadStats()
+        # Pausa entre peticiones del crawl secuencial, adaptada a la latencia y errores del servidor
+        self.crawl_delay = CrawlDelayController(
+            base_delay=config("REQUEST_DELAY", default=2.0, cast=float),
+            min_delay=config("CRAWL_MIN_DELAY", default=0.2, cast=float),
+            max_delay=config("CRAWL_MAX_DELAY", default=60.0, cast=float),
+        )
+        self._pace_requests = False
+        # Sesión del portal cifrada en disco: si sigue vigente, login() no repite el formulario
+        self.reuse_session = reuse_session
+        self.session_store = SessionStore(
+            config("SESSION_STORE_PATH", default=".session/fciencias.bin"),
+            config("SESSION_STORE_KEY", default=f"{self.username}:{self.password}"),
+            max_age=config("SESSION_MAX_AGE_HOURS", default=12, cast=float) * 3600,
+        )
+        self.session_probe_url = config("SESSION_PROBE_URL", default=f"{self.base_url}/docencia/horarios/indiceplan/20261/217")
+        self.use_cache = use_cache
+        self.refresh_patterns = refresh_patterns or []
+        self.page_cache = None
+        # Procesos que parsean el HTML mientras el navegador descarga la siguiente página (1 = parsear en el mismo hilo)
+        self.parse_workers = parse_workers or config("PARSE_WORKERS", default=os.cpu_count() or 1, cast=int)
+        self.parser_pool = None
+        # Modo incremental: sourceUrl -> scrapedAt de lo que ya está en MongoDB
+        self.known_professors = {}
+        self.max_age = None
+        self.subject_associations = []
+        self.run_id = None
+        self._session_checked_at = 0.0
 
     def setup_driver(self):
         """Configura el WebDriver para Selenium con mejores opciones"""
         try:
-            options = webdriver.ChromeOptions()
-
-            if self.headless:
-                options.add_argument("--headless=new")  # Nueva sintaxis para headless
-            options.add_argument("--no-sandbox")
-            options.add_argument("--disable-dev-shm-usage")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--disable-extensions")
-            options.add_argument("--disable-gpu")
-            options.add_argument("--window-size=1920,1080")
-            options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option("useAutomationExtension", False)
-
-            # Inicializar driver con manejo de errores
-            self.driver = webdriver.Chrome(options=options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-
-            # Configurar tiempo de espera de página
-            self.driver.set_page_load_timeout(30)
+            self.driver = self._create_driver()
             self.wait = WebDriverWait(self.driver, self.wait_timeout)
 
             logger.info("WebDriver configurado exitosamente")
@@ -61,6 +117,43 @@ class FcienciasScraper:
             logger.error(f"Error inesperado configurando WebDriver: {str(e)}")
             return False
 
+    def _create_driver(self, index=0):
+        """Abre un Chrome con las opciones del scraper (también lo usa el pool para abrir y reemplazar navegadores)"""
+        options = webdriver.ChromeOptions()
+
+        if self.headless:
+            options.add_argument("--headless=new")  # Nueva sintaxis para headless
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--window-size=1920,1080")
+        options.add_argument(f"--user-agent={USER_AGENT}")
+
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option("useAutomationExtension", False)
+
+        profile_dir = None
+        if self.lean_browser:
+            profile_dir = apply_lean_options(options, self.browser_profile_dir, index)
+
+        try:
+            driver = webdriver.Chrome(options=options)
+        except Exception:
+            if profile_dir:
+                shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        # quit_driver borra el perfil al cerrar el navegador
+        driver.profile_dir = profile_dir
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if self.lean_browser:
+            block_requests(driver, self.blocked_url_patterns)
+
+        # Configurar tiempo de espera de página
+        driver.set_page_load_timeout(30)
+        return driver
+
     def check_website_availability(self):
         """Verifica si el sitio web está disponible"""
         try:
@@ -71,6 +164,51 @@ class FcienciasScraper:
             return False
 
     def login(self):
+        """Inicia sesión en el portal; reutiliza la sesión guardada de una corrida anterior si sigue vigente"""
+        if self.reuse_session and self.restore_session():
+            return True
+
+        if not self._login_with_form():
+            return False
+
+        if self.reuse_session:
+            self.session_store.save(self.driver.get_cookies())
+        return True
+
+    def restore_session(self):
+        """Carga en el navegador las cookies guardadas y confirma con la página de prueba que la sesión sigue activa"""
+        cookies = self.session_store.load()
+        if not cookies:
+            return False
+
+        try:
+            # add_cookie solo acepta cookies del dominio de la página actual
+            self.driver.get(self.base_url)
+            for cookie in cookies:
+                self.driver.add_cookie({key: cookie[key] for key in COOKIE_FIELDS if key in cookie})
+
+            self.driver.get(self.session_probe_url)
+            if self._is_logged_in():
+                logger.info("Sesión anterior restaurada; se omite el login")
+                return True
+        except WebDriverException as e:
+            logger.warning(f"No se pudo restaurar la sesión guardada: {str(e)}")
+
+        logger.info("La sesión guardada ya no es válida; iniciando sesión de nuevo")
+        self.session_store.clear()
+        try:
+            self.driver.delete_all_cookies()
+        except WebDriverException:
+            pass
+        return False
+
+    def _is_logged_in(self):
+        """Fuera de /acceder y sin campo de contraseña en la página actual"""
+        if "acceder" in self.driver.current_url:
+            return False
+        return not self.driver.find_elements(By.XPATH, "//input[@type='password']")
+
+    def _login_with_form(self):
         """Realiza el login en el portal de la facultad con múltiples estrategias"""
         try:
             logger.info("Iniciando sesión en el portal...")
@@ -230,95 +368,502 @@ class FcienciasScraper:
         except Exception as e:
             logger.error(f"No se pudo tomar screenshot: {str(e)}")
 
-    def scrape_all_professors(self, max_subjects=None):
-        """Función principal que obtiene todos los profesores"""
-        # Configurar driver
-        if not self.setup_driver():
+    def setup_http_backend(self):
+        """Copia la sesión del navegador a un cliente HTTP para el resto del crawl"""
+        self.http_fetcher = HttpFetcher(self.base_url, timeout=self.wait_timeout, pool_size=max(10, self.max_concurrency), cache=self.page_cache)
+        self.http_fetcher.load_cookies_from_driver(self.driver)
+        logger.info("Backend HTTP activo: Chrome solo se usará como respaldo")
+
+    def setup_browser_pool(self):
+        """Abre los navegadores adicionales con las cookies del que hizo login; el pool adopta también a este"""
+        self.browser_pool = BrowserPool(
+            self._create_driver,
+            self.base_url,
+            self.browsers,
+            wait_timeout=self.wait_timeout,
+            max_memory_mb=self.browser_max_memory_mb,
+            page_stats=self.page_stats,
+            on_restart=self._adopt_restarted_browser,
+        )
+        self.browser_pool.start(self.driver)
+
+    def _adopt_restarted_browser(self, instance):
+        """El navegador 0 del pool es el del login: si el pool lo reinicia, ensure_session debe usar el nuevo"""
+        if instance.index != 0:
+            return
+        with self._driver_lock:
+            self.driver = instance.driver
+            self.wait = WebDriverWait(self.driver, self.wait_timeout)
+        logger.info("El navegador de la sesión se reinició en el pool; se usa el nuevo")
+
+    def open_page_cache(self):
+        """Abre la caché de páginas en disco (se omite con --no-cache)"""
+        if not self.use_cache:
+            logger.info("Caché de páginas desactivada")
+            return
+        cache_dir = config("PAGE_CACHE_DIR", default=".cache")
+        max_bytes = config("PAGE_CACHE_MAX_MB", default=200, cast=int) * 1024 * 1024
+        self.page_cache = PageCache(f"{cache_dir}/pages.sqlite", max_bytes=max_bytes, refresh_patterns=self.refresh_patterns)
+
+    def _get_page_source(self, url):
+        """Obtiene el HTML de una página con el backend activo, usando Selenium como respaldo"""
+        if self.http_fetcher is not None:
+            # La caché se consulta antes de la pausa del crawl: las páginas vigentes no esperan
+            entry = self.page_cache.lookup(url) if self.page_cache is not None else None
+            if entry and entry["fresh"]:
+                return entry["body"]
+            try:
+                return self._timed_request(url, lambda url: self.http_fetcher.download(url, entry))
+            except Exception as e:
+                logger.warning(f"Fallo HTTP en {url}: {str(e)}. Usando Selenium como respaldo")
+        elif self.page_cache is not None:
+            cached = self.page_cache.get_fresh(url)
+            if cached is not None:
+                return cached
+
+        page_source = self._timed_request(url, self._load_in_browser)
+        if self.page_cache is not None:
+            self.page_cache.store(url, page_source)
+        return page_source
+
+    def _load_in_browser(self, url):
+        if self.browser_pool is not None:
+            return self.browser_pool.fetch(url)
+
+        # El crawl asíncrono llama desde varios hilos; el navegador solo atiende uno a la vez
+        with self._driver_lock:
+            # Esperar a que cargue el contenido principal
+            return load_page(self.driver, self.wait, url, self.page_stats)
+
+    def _timed_request(self, url, fetch):
+        """Hace la petición midiendo latencia y errores para CrawlDelayController; en el crawl secuencial antes espera su pausa"""
+        if self._pace_requests:
+            self.crawl_delay.wait(url)
+        start = time.perf_counter()
+        try:
+            page_source = fetch(url)
+        except Exception as e:
+            self.crawl_delay.observe(url, time.perf_counter() - start, error=e)
+            raise
+        self.crawl_delay.observe(url, time.perf_counter() - start)
+        return page_source
+
+    def scrape_all_professors(self, max_subjects=None, known_professors=None, max_age=None, resume_run_id=None):
+        """Función principal que obtiene todos los profesores.
+
+        En modo incremental (known_professors + max_age en segundos) los profesores scrapeados hace
+        menos de max_age no se vuelven a descargar; sus asignaturas quedan en subject_associations.
+        El avance se guarda en un checkpoint; con resume_run_id se reanuda una corrida interrumpida.
+        Es un generador: cada profesor se emite en cuanto se termina de extraer.
+        """
+        self.known_professors = known_professors or {}
+        self.max_age = max_age
+        self.subject_associations = []
+
+        checkpoint_dir = config("CHECKPOINT_DIR", default=".checkpoints")
+        if resume_run_id:
+            checkpoint = CrawlCheckpoint.load(resume_run_id, checkpoint_dir)
+        else:
+            checkpoint = CrawlCheckpoint(directory=checkpoint_dir)
+        self.run_id = checkpoint.run_id
+        logger.info(f"Corrida {checkpoint.run_id} (reanudable con --resume {checkpoint.run_id})")
+
+        # Con una sesión ya abierta (daemon) el navegador y el login se reutilizan y no se cierran al terminar
+        owns_session = self.driver is None
+        if owns_session and not self.setup_driver():
             raise Exception("No se pudo configurar WebDriver")
+        owns_parser_pool = self.parser_pool is None
 
         try:
-            # Intentar login
-            if not self.login():
-                raise Exception("No se pudo realizar el login")
+            if owns_session:
+                self._open_session()
+
+            # Obtener todas las asignaturas (o las de la corrida que se reanuda)
+            if checkpoint.subjects:
+                subjects = checkpoint.subjects
+            else:
+                subjects = self.get_subjects()
+                if not subjects:
+                    raise Exception("No se pudieron obtener las asignaturas")
+
+                # Limitar para pruebas si se especifica
+                if max_subjects:
+                    subjects = subjects[:max_subjects]
+                    logger.info(f"MODO PRUEBA: Procesando {max_subjects} asignaturas")
 
-            # Obtener todas las asignaturas
-            subjects = self.get_subjects()
-            if not subjects:
-                raise Exception("No se pudieron obtener las asignaturas")
+                checkpoint.set_subjects(subjects)
 
-            # Limitar para pruebas si se especifica
-            if max_subjects:
-                subjects = subjects[:max_subjects]
-                logger.info(f"MODO PRUEBA: Procesando {max_subjects} asignaturas")
+            frontier = ProfessorFrontier(checkpoint.frontier_entries)
+            total_professors = 0
 
-            all_professors = []
-            processed_emails = set()
+            # Primero los registros que una corrida anterior ya había terminado
+            for entry, professor_data in checkpoint.finished_records(frontier):
+                if self._finalize_professor(frontier, entry, professor_data):
+                    total_professors += 1
+                    yield professor_data
 
-            total_subjects = len(subjects)
+            if owns_parser_pool and self.parse_workers > 1:
+                self.parser_pool = ParserPool(self.parse_workers)
 
-            for i, subject in enumerate(subjects, 1):
-                logger.info(f"[{i}/{total_subjects}] Procesando: {subject['name']}")
+            if self.browser_pool is not None or (self.http_fetcher is not None and self.max_concurrency > 1):
+                # El crawl asíncrono reparte las peticiones con su límite de tasa por host y la pausa adaptativa
+                results = self._crawl_professors_async(subjects, frontier, checkpoint)
+            else:
+                self._pace_requests = True
+                if self.parser_pool is not None:
+                    results = self._crawl_professors_pipelined(subjects, frontier, checkpoint)
+                else:
+                    results = self._crawl_professors_sequential(subjects, frontier, checkpoint)
+
+            for entry, professor_data in results:
+                if self._finalize_professor(frontier, entry, professor_data):
+                    total_professors += 1
+                    yield professor_data
+
+            checkpoint.mark_completed()
+            logger.info(f"Proceso completado. Total de profesores únicos: {total_professors}")
+
+        except Exception as e:
+            logger.error(f"Error en el proceso de scraping: {str(e)}")
+            logger.error(f"El avance quedó guardado; reanuda con: --resume {checkpoint.run_id}")
+        finally:
+            self._pace_requests = False
+            delay_metrics = self.crawl_delay.metrics()
+            if delay_metrics:
+                logger.info(f"Peticiones y pausas por tipo de página: {delay_metrics}")
+            checkpoint.close()
+            if owns_parser_pool and self.parser_pool:
+                self.parser_pool.close()
+                self.parser_pool = None
+            if owns_session:
+                self.close_session()
+
+    def start_session(self):
+        """Abre el navegador y la sesión del portal para varios crawls seguidos (los usa el daemon)"""
+        if not self.setup_driver():
+            raise Exception("No se pudo configurar WebDriver")
+        try:
+            self._open_session()
+        except Exception:
+            self.close_session()
+            raise
+        self._session_checked_at = time.time()
+        if self.parse_workers > 1:
+            self.parser_pool = ParserPool(self.parse_workers)
+
+    def _open_session(self):
+        self.open_page_cache()
+
+        # Intentar login
+        if not self.login():
+            raise Exception("No se pudo realizar el login")
+
+        if self.backend == "http":
+            self.setup_http_backend()
+        elif self.browsers > 1:
+            self.setup_browser_pool()
+
+    def ensure_session(self, max_idle=300):
+        """En sesiones largas, confirma con la página de prueba que el login sigue activo y lo repite si expiró"""
+        if time.time() - self._session_checked_at < max_idle:
+            return True
 
-                # Obtener profesores de esta asignatura
-                professors = self.get_professors_from_subject(subject["url"], subject["name"])
+        with self._driver_lock:
+            self.driver.get(self.session_probe_url)
+            if not self._is_logged_in():
+                logger.info("La sesión del portal expiró; iniciando sesión de nuevo")
+                if not self._login_with_form():
+                    return False
+                self.session_store.save(self.driver.get_cookies())
+                if self.http_fetcher is not None:
+                    self.http_fetcher.load_cookies_from_driver(self.driver)
+                if self.browser_pool is not None:
+                    self.browser_pool.set_cookies(self.driver.get_cookies())
+
+        self._session_checked_at = time.time()
+        return True
+
+    def close_session(self):
+        """Cierra navegador(es), caché, cliente HTTP y procesos de parseo"""
+        if self.parser_pool:
+            self.parser_pool.close()
+            self.parser_pool = None
+        if self.http_fetcher:
+            self.http_fetcher.close()
+            self.http_fetcher = None
+        if self.page_cache:
+            self.page_cache.close()
+            self.page_cache = None
+        if self.page_stats.durations:
+            logger.info(f"Páginas cargadas con Chrome (perfil {'lean' if self.lean_browser else 'completo'}): {self.page_stats.summary()}")
+        if self.browser_pool:
+            # El pool cierra también el navegador del login (o el que lo reemplazó)
+            logger.info(f"Pool de navegadores: {self.browser_pool.stats()}")
+            self.browser_pool.close()
+            self.browser_pool = None
+            self.driver = None
+        if self.driver:
+            quit_driver(self.driver)
+            self.driver = None
+            logger.info("WebDriver cerrado")
+
+    def _crawl_professors_sequential(self, subjects, frontier, checkpoint):
+        """Recorre asignaturas y profesores uno por uno, emitiendo (entrada, registro) al terminar cada profesor"""
+        total_subjects = len(subjects)
+
+        for i, subject in enumerate(subjects, 1):
+            if checkpoint.is_subject_done(subject["id"]):
+                continue
+
+            logger.info(f"[{i}/{total_subjects}] Procesando: {subject['name']}")
+
+            # Obtener profesores de esta asignatura
+            for professor in self.get_professors_from_subject(subject["url"], subject["name"]):
+                frontier.add(professor, subject["name"])
+            checkpoint.mark_subject_done(subject["id"], frontier)
+
+        logger.info(f"Profesores únicos por directorio: {len(frontier)}")
+
+        for entry in self._entries_to_fetch(frontier, checkpoint):
+            # Extraer datos del profesor una sola vez, con la primera asignatura en la que apareció
+            professor_data = self.extract_professor_data(entry["url"], entry["subjects"][0])
+            if professor_data:
+                checkpoint.record_professor(entry["id"], professor_data)
+                yield entry, professor_data
+
+    def _crawl_professors_pipelined(self, subjects, frontier, checkpoint):
+        """Mismo recorrido que _crawl_professors_sequential, pero el navegador no espera al parseo.
+
+        Cada página descargada se manda a ParserPool y el navegador pasa a la siguiente; los
+        resultados se atienden en el orden en que se pidieron, así la frontera queda igual que en el
+        recorrido secuencial. El historial de un profesor se descarga en cuanto su página del
+        directorio termina de parsearse.
+        """
+        total_subjects = len(subjects)
+        pending_subjects = deque()
+
+        def add_professors(subject, future):
+            try:
+                professors = future.result()
+            except Exception as e:
+                logger.error(f"Error obteniendo profesores de {subject['name']}: {str(e)}")
+                professors = []
+            for professor in professors:
+                frontier.add(professor, subject["name"])
+            checkpoint.mark_subject_done(subject["id"], frontier)
+
+        for i, subject in enumerate(subjects, 1):
+            if checkpoint.is_subject_done(subject["id"]):
+                continue
+
+            logger.info(f"[{i}/{total_subjects}] Procesando: {subject['name']}")
+            pending_subjects.append((subject, self._fetch_and_parse(subject["url"], fciencias_parser.extract_professors_from_subject, subject["name"], self.base_url)))
+            while pending_subjects and pending_subjects[0][1].done():
+                add_professors(*pending_subjects.popleft())
+
+        while pending_subjects:
+            add_professors(*pending_subjects.popleft())
+
+        logger.info(f"Profesores únicos por directorio: {len(frontier)}")
+
+        directories = deque()  # (entrada, future del directorio)
+        histories = deque()  # (entrada, directorio, future del historial)
+
+        def finish(entry, directory, all_subjects):
+            # Extraer datos del profesor una sola vez, con la primera asignatura en la que apareció
+            professor_data = fciencias_parser.build_professor(directory["name"], directory["email"], entry["url"], entry["subjects"][0], all_subjects)
+            checkpoint.record_professor(entry["id"], professor_data)
+            return entry, professor_data
+
+        def advance(block):
+            """Atiende los parseos terminados (todos si block); emite (entrada, registro) de los profesores completos"""
+            while directories and (block or directories[0][1].done()):
+                entry, future = directories.popleft()
+                try:
+                    directory = future.result()
+                except Exception as e:
+                    logger.error(f"Error extrayendo datos de {entry['url']}: {str(e)}")
+                    continue
 
-                for professor in professors:
-                    # Extraer datos del profesor
-                    professor_data = self.extract_professor_data(professor["url"], subject["name"])
+                if directory["allGroupsUrl"]:
+                    logger.info(f"Navegando al historial completo: {directory['allGroupsUrl']}")
+                    histories.append((entry, directory, self._fetch_and_parse(directory["allGroupsUrl"], fciencias_parser.extract_history_subjects)))
+                else:
+                    logger.warning("No se encontró el enlace 'Ver todos los grupos'. Usando método de extracción tradicional.")
+                    yield finish(entry, directory, directory["fallbackSubjects"])
 
-                    if professor_data and professor_data["email"] and professor_data["email"] not in processed_emails:
+            while histories and (block or histories[0][2].done()):
+                entry, directory, future = histories.popleft()
+                try:
+                    all_subjects = future.result()
+                except Exception as e:
+                    logger.error(f"Error extrayendo materias del historial: {str(e)}")
+                    logger.info("Usando método de extracción tradicional como fallback")
+                    all_subjects = directory["fallbackSubjects"]
+                yield finish(entry, directory, all_subjects)
 
-                        all_professors.append(professor_data)
-                        processed_emails.add(professor_data["email"])
-                        logger.info(f"  Agregado: {professor_data['name']}")
+        for entry in self._entries_to_fetch(frontier, checkpoint):
+            directories.append((entry, self._fetch_and_parse(entry["url"], fciencias_parser.extract_directory_page, self.base_url)))
+            yield from advance(block=False)
 
-                    time.sleep(2)  # Respeta el servidor
+        yield from advance(block=True)
 
-                time.sleep(3)  # Pausa más larga entre asignaturas
+    def _fetch_and_parse(self, url, parse, *args):
+        """Descarga la página en este hilo y encola su parseo; un error de descarga llega como excepción del Future"""
+        try:
+            html = self._get_page_source(url)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+            return future
+        return self.parser_pool.submit(parse, html, *args)
+
+    async def _parse_async(self, parse, *args):
+        """Parsea en ParserPool si está activo, para no detener el loop de asyncio con trabajo de CPU"""
+        if self.parser_pool is None:
+            return parse(*args)
+        return await self.parser_pool.parse(parse, *args)
+
+    def _crawl_professors_async(self, subjects, frontier, checkpoint):
+        """Descarga grupos, directorio e historial de muchos profesores a la vez con límite de tasa.
+
+        El intervalo entre peticiones al host es el mayor entre el de rate_limit y la pausa que
+        CrawlDelayController lleva para el tipo de página, así timeouts, 5xx y respuestas lentas
+        también frenan el crawl concurrente.
+
+        El loop de asyncio corre en un hilo aparte y entrega cada (entrada, registro) por una cola
+        en cuanto termina, para que el consumidor pueda guardarlo sin esperar al resto del crawl.
+        """
+        # Con el pool, una descarga en vuelo por navegador
+        concurrency = self.browser_pool.size if self.browser_pool is not None else self.max_concurrency
+        if self.browser_pool is not None:
+            logger.info(f"Los {self.browser_pool.size} navegadores comparten el límite de {self.rate_limit} req/s por host (--rate-limit / CRAWL_RATE_LIMIT)")
+        # _timed_request ya alimenta a crawl_delay; su pausa actual por tipo de página alarga el intervalo por host
+        crawler = AsyncCrawler(self._get_page_source, max_concurrency=concurrency, requests_per_second=self.rate_limit, interval_for=self.crawl_delay.delay_for)
+        results = queue.Queue()
+        done = object()
+
+        async def crawl_subject(crawler, subject):
+            for professor in await self._get_professors_from_subject_async(crawler, subject):
+                frontier.add(professor, subject["name"])
+            checkpoint.mark_subject_done(subject["id"], frontier)
+
+        async def crawl_professor(crawler, entry):
+            professor_data = await self._extract_professor_data_async(crawler, entry["url"], entry["subjects"][0])
+            if professor_data:
+                checkpoint.record_professor(entry["id"], professor_data)
+                results.put((entry, professor_data))
+
+        async def crawl(crawler):
+            # Páginas de grupos de las asignaturas pendientes
+            pending_subjects = [subject for subject in subjects if not checkpoint.is_subject_done(subject["id"])]
+            await crawler.gather(crawl_subject(crawler, subject) for subject in pending_subjects)
+
+            # Directorio + historial de cada profesor único
+            entries = self._entries_to_fetch(frontier, checkpoint)
+            logger.info(f"Descargando datos de {len(entries)} profesores únicos por directorio")
+            await crawler.gather(crawl_professor(crawler, entry) for entry in entries)
+
+        def run():
+            try:
+                crawler.run(crawl)
+                results.put(done)
+            except BaseException as e:
+                results.put(e)
 
-                # Break early if in test mode with max_subjects
-                if max_subjects and i >= max_subjects:
+        thread = threading.Thread(target=run, name="async-crawler", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = results.get()
+                if item is done:
                     break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # Si el consumidor deja de iterar, no seguir descargando profesores
+            crawler.cancel()
+            thread.join()
+
+    def _entries_to_fetch(self, frontier, checkpoint):
+        """Profesores de la frontera que faltan por descargar (sin terminados ni recientes en modo incremental)"""
+        entries = [entry for entry in frontier.entries() if not checkpoint.is_professor_done(entry["id"])]
+        if not self.known_professors or not self.max_age:
+            return entries
+
+        now = time.time()
+        to_fetch = []
+        for entry in entries:
+            scraped_at = self.known_professors.get(entry["url"])
+            if scraped_at is not None and now - scraped_at < self.max_age:
+                # Solo registrar las asignaturas en las que apareció; no descargar directorio ni historial
+                self.subject_associations.append({"sourceUrl": entry["url"], "subjects": list(entry["subjects"])})
+            else:
+                to_fetch.append(entry)
+
+        logger.info(f"Modo incremental: {len(self.subject_associations)} profesores recientes omitidos, {len(to_fetch)} por descargar")
+        return to_fetch
+
+    def _finalize_professor(self, frontier, entry, professor_data):
+        """Combina las asignaturas de la frontera en el registro. Regresa False si debe descartarse por no tener email.
+
+        Dos entradas del directorio con el mismo email se combinan en MongoDB (upsert sobre el índice único).
+        """
+        if not professor_data["email"]:
+            return False
+
+        frontier.merge_subjects(entry["id"], professor_data)
+        professor_data["isComplexAnalysis"] = fciencias_parser.is_complex_analysis([professor_data["subject"]] + professor_data["otherSubjects"])
 
-            logger.info(f"Proceso completado. Total de profesores únicos: {len(all_professors)}")
-            return all_professors
+        logger.info(f"  Agregado: {professor_data['name']}")
+        return True
 
+    async def _get_professors_from_subject_async(self, crawler, subject):
+        """Versión asíncrona de get_professors_from_subject"""
+        try:
+            html = await crawler.fetch_page(subject["url"])
+            return await self._parse_async(fciencias_parser.extract_professors_from_subject, html, subject["name"], self.base_url)
         except Exception as e:
-            logger.error(f"Error en el proceso de scraping: {str(e)}")
+            logger.error(f"Error obteniendo profesores de {subject['name']}: {str(e)}")
             return []
-        finally:
-            if self.driver:
-                self.driver.quit()
-                logger.info("WebDriver cerrado")
 
-    # Los métodos get_subjects, get_professors_from_subject, extract_professor_data, etc.
-    # se mantienen igual que en la versión anterior
-    def get_subjects(self):
-        """Obtiene la lista de todas las asignaturas de matemáticas"""
+    async def _extract_professor_data_async(self, crawler, professor_url, source_subject):
+        """Versión asíncrona de extract_professor_data: directorio e historial pasan por el crawler"""
         try:
-            logger.info("Obteniendo lista de asignaturas...")
-            url = f"{self.base_url}/docencia/horarios/indiceplan/20261/217"
-            self.driver.get(url)
+            html = await crawler.fetch_page(professor_url)
+            directory = await self._parse_async(fciencias_parser.extract_directory_page, html, self.base_url)
 
-            # Esperar a que cargue el contenido principal
-            self.wait.until(EC.presence_of_element_located((By.ID, "info-contenido")))
+            groups_url = directory["allGroupsUrl"]
+            if groups_url:
+                try:
+                    logger.info(f"Descargando historial completo: {groups_url}")
+                    all_subjects = await self._parse_async(fciencias_parser.extract_history_subjects, await crawler.fetch_page(groups_url))
+                except Exception as e:
+                    logger.error(f"Error extrayendo materias del historial: {str(e)}")
+                    logger.info("Usando método de extracción tradicional como fallback")
+                    all_subjects = directory["fallbackSubjects"]
+            else:
+                logger.warning("No se encontró el enlace 'Ver todos los grupos'. Usando método de extracción tradicional.")
+                all_subjects = directory["fallbackSubjects"]
 
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-            subject_links = []
+            return fciencias_parser.build_professor(directory["name"], directory["email"], professor_url, source_subject, all_subjects)
 
-            # Encontrar todos los enlaces de asignaturas
-            links = soup.find_all("a", href=re.compile(r"/docencia/horarios/20261/217/\d+"))
-            for link in links:
-                subject_name = link.get_text().strip()
-                # Limpiar el nombre (remover "X grupos")
-                subject_name = re.sub(r",\s*\d+\s*grupos?", "", subject_name)
-                href = link["href"]
-                subject_id = re.search(r"/(\d+)$", href).group(1)
+        except Exception as e:
+            logger.error(f"Error extrayendo datos de {professor_url}: {str(e)}")
+            return None
 
-                subject_links.append({"name": subject_name, "url": f"{self.base_url}{href}", "id": subject_id})
+    def fetch_page(self, url):
+        """HTML de una página del portal con la sesión, la caché y el backend activos (lo usa el daemon)"""
+        return self._get_page_source(url)
 
-            logger.info(f"Encontradas {len(subject_links)} asignaturas")
-            return subject_links
+    # La extracción vive en fciencias_parser; estos métodos solo descargan la página y la delegan
+    def get_subjects(self):
+        """Obtiene la lista de todas las asignaturas de matemáticas"""
+        try:
+            logger.info("Obteniendo lista de asignaturas...")
+            url = f"{self.base_url}/docencia/horarios/indiceplan/20261/217"
+            return fciencias_parser.parse_subjects(fciencias_parser.make_soup(self._get_page_source(url)), self.base_url)
 
         except Exception as e:
             logger.error(f"Error obteniendo asignaturas: {str(e)}")
@@ -327,34 +872,8 @@ class FcienciasScraper:
     def get_professors_from_subject(self, subject_url, subject_name):
         """Obtiene todos los profesores de una asignatura específica"""
         try:
-            self.driver.get(subject_url)
-
-            # Esperar a que cargue la página de grupos
-            self.wait.until(EC.presence_of_element_located((By.ID, "info-contenido")))
-
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-            professor_links = []
-
-            # ESTRATEGIA MEJORADA: Buscar por estructura de tabla específica
-            tables = soup.find_all("table")
-            for table in tables:
-                rows = table.find_all("tr")
-                for row in rows:
-                    cells = row.find_all("td")
-                    if len(cells) >= 2:
-                        first_cell_text = cells[0].get_text().strip()
-                        if first_cell_text == "Profesor":
-                            professor_link = cells[1].find("a", href=re.compile(r"/directorio/\d+"))
-                            if professor_link:
-                                professor_name = professor_link.get_text().strip()
-                                href = professor_link["href"]
-                                professor_id = re.search(r"/(\d+)$", href).group(1)
-
-                                professor_links.append({"name": professor_name, "url": f"{self.base_url}{href}", "id": professor_id, "source_subject": subject_name})
-                                break
-
-            logger.info(f"Encontrados {len(professor_links)} profesores en {subject_name}")
-            return professor_links
+            soup = fciencias_parser.make_soup(self._get_page_source(subject_url))
+            return fciencias_parser.parse_professors_from_subject(soup, subject_name, self.base_url)
 
         except Exception as e:
             logger.error(f"Error obteniendo profesores de {subject_name}: {str(e)}")
@@ -363,46 +882,12 @@ class FcienciasScraper:
     def extract_professor_data(self, professor_url, source_subject):
         """Extrae los datos completos de un profesor"""
         try:
-            self.driver.get(professor_url)
-
-            # Esperar a que cargue la página del profesor
-            self.wait.until(EC.presence_of_element_located((By.ID, "info-contenido")))
-
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-
-            # Extraer nombre
-            name_element = soup.find("h1")
-            name = name_element.get_text().strip() if name_element else ""
-
-            # Extraer email
-            email = ""
-            email_elements = soup.find_all("a", href=re.compile(r"^mailto:"))
-            for email_element in email_elements:
-                email = email_element["href"].replace("mailto:", "").strip()
-                if email:
-                    break
+            soup = fciencias_parser.make_soup(self._get_page_source(professor_url))
 
             # Extraer todas las materias que imparte
             all_subjects = self._extract_all_subjects(soup)
 
-            professor_data = {
-                "name": name,
-                "email": email,
-                "subject": source_subject,
-                "otherSubjects": [s for s in all_subjects if s != source_subject],
-                "infoAboutPersonalWork": "",
-                "isComplexAnalysis": self._is_complex_analysis(all_subjects),
-                "wasEmailSend": False,
-                "sourceUrl": professor_url,
-                "scrapedAt": time.time(),
-            }
-
-            if email:
-                logger.info(f"Datos extraídos para: {name} - {email}")
-            else:
-                logger.warning(f"Profesor sin email: {name}")
-
-            return professor_data
+            return fciencias_parser.parse_professor(soup, professor_url, source_subject, all_subjects)
 
         except Exception as e:
             logger.error(f"Error extrayendo datos de {professor_url}: {str(e)}")
@@ -414,76 +899,22 @@ class FcienciasScraper:
 
         try:
             # Buscar el enlace "Ver todos los grupos"
-            all_groups_link = soup.find("a", string=re.compile(r"Ver todos los grupos"))
-
-            if all_groups_link and all_groups_link.get("href"):
-                # Construir URL completa del historial
-                groups_url = all_groups_link["href"]
-                if not groups_url.startswith("http"):
-                    groups_url = f"{self.base_url}{groups_url}"
+            groups_url = fciencias_parser.find_all_groups_url(soup, self.base_url)
 
+            if groups_url:
                 logger.info(f"Navegando al historial completo: {groups_url}")
 
-                # Navegar a la página del historial
-                self.driver.get(groups_url)
-
-                # Esperar a que cargue la página del historial
-                self.wait.until(EC.presence_of_element_located((By.ID, "info-contenido")))
-
-                # Parsear el HTML del historial
-                historical_soup = BeautifulSoup(self.driver.page_source, "html.parser")
-
-                # Extraer todas las asignaturas del historial
-                subject_links = historical_soup.find_all("a", href=re.compile(r"/docencia/horarios/detalles/\d+"))
-
-                for link in subject_links:
-                    link_text = link.get_text().strip()
-                    # Limpiar el texto: remover ", Profesor", ", Ayudante" y cualquier rol similar
-                    subject_name = re.sub(r",\s*(Profesor|Ayudante).*$", "", link_text).strip()
-
-                    if subject_name and subject_name not in subjects:
-                        subjects.append(subject_name)
-
-                logger.info(f"Extraídas {len(subjects)} asignaturas únicas del historial completo")
+                # Descargar y parsear el HTML del historial
+                historical_soup = fciencias_parser.make_soup(self._get_page_source(groups_url))
+                subjects = fciencias_parser.parse_history_subjects(historical_soup)
 
             else:
                 logger.warning("No se encontró el enlace 'Ver todos los grupos'. Usando método de extracción tradicional.")
-                subjects = self._extract_subjects_fallback(soup)
+                subjects = fciencias_parser.parse_subjects_fallback(soup)
 
         except Exception as e:
             logger.error(f"Error extrayendo materias del historial: {str(e)}")
             logger.info("Usando método de extracción tradicional como fallback")
-            subjects = self._extract_subjects_fallback(soup)
+            subjects = fciencias_parser.parse_subjects_fallback(soup)
 
         return subjects
-
-    def _extract_subjects_fallback(self, soup):
-        """Método de respaldo para extraer materias de la sección de Enseñanza (comportamiento original)"""
-        subjects = []
-
-        enseñanza_headers = soup.find_all(["h2", "h3"], string=re.compile("Enseñanza"))
-
-        for header in enseñanza_headers:
-            current_element = header.find_next_sibling()
-            while current_element and current_element.name not in ["h1", "h2", "h3"]:
-                if current_element.name == "div":
-                    subject_links = current_element.find_all("a", href=re.compile(r"/docencia/horarios/detalles/\d+"))
-
-                    for link in subject_links:
-                        link_text = link.get_text().strip()
-                        subject_name = re.sub(r",\s*Profesor.*$", "", link_text).strip()
-                        if subject_name and subject_name not in subjects:
-                            subjects.append(subject_name)
-
-                current_element = current_element.find_next_sibling()
-
-        return list(set(subjects))
-
-    def _is_complex_analysis(self, subjects):
-        """Determina si el profesor imparte Análisis Complejo"""
-        complex_keywords = ["Variable Compleja I", "Variable Compleja II", "Variable Compleja", "Análisis Complejo", "Funciones Complejas"]
-
-        for subject in subjects:
-            if any(keyword.lower() in subject.lower() for keyword in complex_keywords):
-                return True
-        return False
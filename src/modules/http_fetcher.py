@@ -0,0 +1,82 @@
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+
+class SessionExpiredError(Exception):
+    """La sesión autenticada ya no es válida (el portal redirigió al login)"""
+
+
+class HttpFetcher:
+    """Cliente HTTP que reutiliza las cookies de la sesión iniciada con Selenium"""
+
+    def __init__(self, base_url, timeout=30, pool_size=10, cache=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.cache = cache
+
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "User-Agent": USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Encoding": "gzip, deflate",
+                "Accept-Language": "es-MX,es;q=0.9",
+                "Connection": "keep-alive",
+            }
+        )
+
+    def load_cookies_from_driver(self, driver):
+        """Copia las cookies del navegador a la sesión de requests"""
+        cookies = driver.get_cookies()
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+        logger.info(f"Copiadas {len(cookies)} cookies del navegador a la sesión HTTP")
+
+    def fetch(self, url):
+        """Descarga una página y regresa su HTML, sirviéndola desde la caché cuando es posible"""
+        entry = self.cache.lookup(url) if self.cache else None
+        if entry and entry["fresh"]:
+            return entry["body"]
+        return self.download(url, entry)
+
+    def download(self, url, entry=None):
+        """Pide la página al servidor; entry es la copia vencida de la caché, que se revalida si la hay"""
+        # Revalidación condicional de la copia vencida
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry:
+            self.cache.mark_revalidated(url)
+            return entry["body"]
+        response.raise_for_status()
+
+        if "/acceder" in response.url:
+            raise SessionExpiredError(f"Redirigido al login al solicitar {url}")
+
+        # Sin charset explícito requests asume ISO-8859-1, lo que rompe los acentos
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            response.encoding = response.apparent_encoding
+
+        if self.cache:
+            self.cache.store(url, response.text, etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+        return response.text
+
+    def close(self):
+        """Cierra la sesión HTTP y su pool de conexiones"""
+        self.session.close()
@@ -0,0 +1,77 @@
+import logging
+import os
+import time
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Bandeja local de mensajes ya serializados (RFC 5322), uno por archivo .eml.
+
+    Los archivos viven en pending/, sent/ y failed/ y se llaman como el _id del profesor, así que
+    el outbox se puede revisar a mano antes de enviar. Cada mensaje se escribe en tmp/ y se mueve
+    con os.replace, de modo que quien drena pending/ nunca ve un archivo a medias.
+    """
+
+    STATES = ("pending", "sent", "failed")
+
+    def __init__(self, directory: str = "outbox") -> None:
+        self.directory = Path(directory)
+        for state in self.STATES + ("tmp",):
+            (self.directory / state).mkdir(parents=True, exist_ok=True)
+        self._parser = BytesHeaderParser()
+
+    def _path(self, state: str, key: str) -> Path:
+        return self.directory / state / f"{key}.eml"
+
+    def has_pending(self, key: str) -> bool:
+        return self._path("pending", key).exists()
+
+    def put(self, key: str, raw_message: bytes) -> None:
+        """Guarda un mensaje en pending/ de forma atómica (reemplaza uno anterior con la misma clave)"""
+        tmp_path = self._path("tmp", key)
+        with open(tmp_path, "wb") as f:
+            f.write(raw_message)
+        os.replace(tmp_path, self._path("pending", key))
+
+    def move(self, key: str, state: str) -> None:
+        """Mueve un mensaje de pending/ a sent/ o failed/"""
+        try:
+            os.replace(self._path("pending", key), self._path(state, key))
+        except FileNotFoundError:
+            # Otro proceso ya lo movió
+            pass
+
+    def read(self, key: str) -> Optional[Dict]:
+        """Mensaje pendiente como job del SenderEngine: _id, email y los bytes a enviar"""
+        try:
+            raw_message = self._path("pending", key).read_bytes()
+        except FileNotFoundError:
+            return None
+        headers = self._parser.parsebytes(raw_message)
+        professor_id = ObjectId(key) if ObjectId.is_valid(key) else key
+        return {"_id": professor_id, "email": headers["To"], "message": raw_message, "outboxKey": key}
+
+    def drain(self, until=None, poll_interval: float = 0.5) -> Iterator[Dict]:
+        """Recorre pending/ una vez; con until (threading.Event) sigue esperando mensajes nuevos hasta que se active"""
+        seen = set()
+        while True:
+            done = until is None or until.is_set()
+            keys = sorted(path.stem for path in (self.directory / "pending").glob("*.eml") if path.stem not in seen)
+            for key in keys:
+                seen.add(key)
+                message = self.read(key)
+                if message is not None:
+                    yield message
+            if done and not keys:
+                return
+            if not keys:
+                time.sleep(poll_interval)
+
+    def counts(self) -> Dict[str, int]:
+        return {state: sum(1 for _ in (self.directory / state).glob("*.eml")) for state in self.STATES}
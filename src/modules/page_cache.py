@@ -0,0 +1,137 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# TTL por patrón de URL: casi todo cambia una vez por semestre
+DEFAULT_TTLS = [
+    (r"/docencia/horarios/indiceplan/", 7 * DAY),  # índice de asignaturas
+    (r"/docencia/horarios/\d+/\d+/\d+", 3 * DAY),  # grupos de una asignatura
+    (r"/directorio/\d+", 30 * DAY),  # página del profesor
+]
+DEFAULT_TTL = 7 * DAY  # historiales y cualquier otra página
+
+
+class PageCache:
+    """Caché de páginas en SQLite indexada por URL, con TTL por patrón y expulsión LRU por tamaño"""
+
+    def __init__(self, path, max_bytes=200 * 1024 * 1024, ttls=None, default_ttl=DEFAULT_TTL, refresh_patterns=None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (ttls if ttls is not None else DEFAULT_TTLS)]
+        self.default_ttl = default_ttl
+        self.refresh_patterns = [re.compile(pattern) for pattern in refresh_patterns or []]
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Los hilos del crawl asíncrono comparten la conexión, protegida por un lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_accessed_at ON pages (accessed_at)")
+        self._conn.commit()
+
+    def ttl_for(self, url):
+        """TTL en segundos del primer patrón que coincide con la URL"""
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def is_forced_refresh(self, url):
+        """True si la URL coincide con algún --refresh-pattern"""
+        return any(pattern.search(url) for pattern in self.refresh_patterns)
+
+    def lookup(self, url):
+        """Regresa la entrada de la URL con su campo 'fresh', o None si no está en caché"""
+        if self.is_forced_refresh(url):
+            self.misses += 1
+            return None
+
+        with self._lock:
+            row = self._conn.execute("SELECT body, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            now = time.time()
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+        body, etag, last_modified, fetched_at = row
+        fresh = now - fetched_at < self.ttl_for(url)
+        if fresh:
+            self.hits += 1
+        return {"body": zlib.decompress(body).decode("utf-8"), "etag": etag, "last_modified": last_modified, "fresh": fresh}
+
+    def get_fresh(self, url):
+        """HTML de la URL si está en caché y vigente; None en otro caso"""
+        entry = self.lookup(url)
+        if entry and entry["fresh"]:
+            return entry["body"]
+        return None
+
+    def store(self, url, body, etag=None, last_modified=None):
+        """Guarda (o reemplaza) la página y expulsa las menos usadas si se rebasa el tamaño máximo"""
+        data = zlib.compress(body.encode("utf-8"))
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, body, etag, last_modified, fetched_at, accessed_at, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, data, etag, last_modified, now, now, len(data)),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def mark_revalidated(self, url):
+        """El servidor respondió 304: la copia en disco vuelve a estar vigente"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, url))
+            self._conn.commit()
+        self.revalidated += 1
+
+    def _evict(self):
+        """Expulsión LRU: borra por último acceso hasta quedar debajo de max_bytes"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY accessed_at").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            evicted += 1
+        logger.info(f"Caché de páginas: expulsadas {evicted} entradas (LRU)")
+
+    def close(self):
+        """Cierra la base de datos de la caché"""
+        logger.info(f"Caché de páginas: {self.hits} aciertos, {self.revalidated} revalidadas (304), {self.misses} fallos")
+        self._conn.close()
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(level):
+    logging.basicConfig(level=level, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+class ParserPool:
+    """Procesos que parsean HTML mientras el navegador sigue descargando páginas.
+
+    submit() entrega el HTML crudo a un proceso y regresa un Future. Con max_pending trabajos en
+    vuelo se bloquea (cola acotada), así la memoria no crece si se descarga más rápido de lo que se
+    parsea. Las funciones tienen que ser de nivel de módulo (fciencias_parser.extract_*) para poder
+    mandarse a otro proceso. Los procesos se crean con spawn porque el proceso principal ya tiene
+    hilos vivos (Selenium, el crawl asíncrono) cuando arranca el pool.
+    """
+
+    def __init__(self, workers=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker, initargs=(logging.getLogger().level,)
+        )
+        logger.info(f"Parseo en {self.workers} procesos (máximo {self.max_pending} páginas en cola)")
+
+    def submit(self, parse, *args):
+        """Encola parse(*args) en un proceso; espera solo si la cola está llena"""
+        self._slots.acquire()
+        try:
+            future = self.executor.submit(parse, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def parse(self, parse, *args):
+        """Para el crawl asíncrono: el loop sigue atendiendo descargas mientras un proceso parsea"""
+        # La concurrencia del crawler ya acota cuántas páginas hay en vuelo
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(parse, *args))
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,260 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# SMTP replies providers use to say "slow down": service not available, local error, TLS/temporary failure
+THROTTLE_CODES = {421, 451, 454}
+
+WINDOWS = {"minute": 60, "hour": 3600, "day": 86400}
+
+
+class QuotaExceededError(Exception):
+    """The daily sending budget is exhausted"""
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """True if the exception is an SMTP reply asking the client to back off"""
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code in THROTTLE_CODES
+
+
+class TokenBucket:
+    """Token bucket: capacity tokens refilled evenly over period seconds (or never, for a fixed budget)"""
+
+    def __init__(self, capacity: int, period: float, refill: bool = True) -> None:
+        self.capacity = capacity
+        self.period = period
+        self.refill = refill
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.refill:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / self.period)
+        self._updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available (infinite for an exhausted fixed budget)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        if not self.refill:
+            return float("inf")
+        return (1 - self.tokens) * self.period / self.capacity
+
+    def consume(self, now: float, amount: float = 1) -> None:
+        self._refill(now)
+        self.tokens -= amount
+
+
+class QuotaStore:
+    """Per-account send counters in MongoDB, shared by every process sending from the same account.
+
+    One document per account and calendar window (UTC hour and UTC day); a TTL index removes them
+    once they expire. reserve() counts a message with a conditional $inc that only matches while the
+    counter is under its cap, so processes sharing an account cannot overspend it between them and
+    a restart picks up where the others are.
+    """
+
+    def __init__(self, collection) -> None:
+        self.collection = collection
+        self.collection.create_index([("expiresAt", ASCENDING)], expireAfterSeconds=0, name="quota_expiry")
+
+    @staticmethod
+    def _windows(account: str, now: datetime) -> Dict[str, Tuple[str, datetime]]:
+        """Document id and expiry of the current day and hour, daily first"""
+        hour_start = now.replace(minute=0, second=0, microsecond=0)
+        day_start = hour_start.replace(hour=0)
+        return {
+            "day": (f"{account}:day:{day_start.isoformat()}", day_start + timedelta(days=1)),
+            "hour": (f"{account}:hour:{hour_start.isoformat()}", hour_start + timedelta(hours=1)),
+        }
+
+    def load(self, account: str) -> Dict[str, int]:
+        """Messages already sent by the account in the current hour and day"""
+        usage = {"hour": 0, "day": 0}
+        for window, (doc_id, _) in self._windows(account, datetime.now(timezone.utc)).items():
+            doc = self.collection.find_one({"_id": doc_id}, {"count": 1})
+            if doc:
+                usage[window] = doc["count"]
+        return usage
+
+    def reserve(self, account: str, limits: Dict[str, int]) -> Tuple[Optional[str], Dict[str, int]]:
+        """Counts one message in every window if all of them are under their limit.
+
+        Returns (None, usage after counting) on success, or (the full window, {}) with nothing counted.
+        """
+        usage: Dict[str, int] = {}
+        counted = []
+        for window, (doc_id, expires_at) in self._windows(account, datetime.now(timezone.utc)).items():
+            count = self._increment(account, window, doc_id, expires_at, limits[window])
+            if count is None:
+                for counted_id in counted:
+                    self.collection.update_one({"_id": counted_id}, {"$inc": {"count": -1}})
+                return window, {}
+            counted.append(doc_id)
+            usage[window] = count
+        return None, usage
+
+    def _increment(self, account: str, window: str, doc_id: str, expires_at: datetime, limit: int, attempts: int = 3) -> Optional[int]:
+        """Conditional $inc of one counter. Returns the new count, or None if the counter is at its limit"""
+        for _ in range(attempts):
+            try:
+                doc = self.collection.find_one_and_update(
+                    {"_id": doc_id, "count": {"$lt": limit}},
+                    {"$inc": {"count": 1}, "$setOnInsert": {"account": account, "window": window, "expiresAt": expires_at}},
+                    projection={"count": 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return doc["count"]
+            except DuplicateKeyError:
+                # Either the counter is at its limit (the filter missed, so the upsert tried a second insert)
+                # or another process created it at the same moment; only the first means full
+                existing = self.collection.find_one({"_id": doc_id}, {"count": 1})
+                if existing is not None and existing["count"] >= limit:
+                    return None
+        raise RuntimeError(f"Could not update the {window} send counter for {account}")
+
+    def close(self) -> None:
+        """Nothing is buffered: every reservation is written when it is made"""
+
+
+class AdaptiveRateLimiter:
+    """Token buckets per minute, hour and day plus AIMD pacing for outbound mail.
+
+    The pacing rate starts at the per-minute limit. Every success adds increase_step messages/minute
+    back (additive increase, capped at the per-minute limit); every throttling reply halves it
+    (multiplicative decrease) and pauses all senders for an exponentially growing backoff.
+
+    With a QuotaStore every slot is also reserved in the shared hourly and daily counters before it
+    is handed out, so several processes sending from one account stay under its limits together.
+    Reserved slots count as sent even if the attempt then fails or is throttled.
+    """
+
+    def __init__(
+        self,
+        per_minute: int,
+        per_hour: int,
+        per_day: int,
+        account: str = "default",
+        store: Optional[QuotaStore] = None,
+        increase_step: float = 1.0,
+        min_rate: float = 1.0,
+        base_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+    ) -> None:
+        self.account = account
+        self.store = store
+        self.max_rate = float(per_minute)
+        self.rate = float(per_minute)
+        self.increase_step = increase_step
+        self.min_rate = min_rate
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.throttled = 0
+        self.sent = 0
+        # The daily budget is not trickled back in. The store counts UTC calendar days (and hours), so for a
+        # provider that enforces a rolling 24h window set per_day with some margin
+        self.buckets = {
+            "minute": TokenBucket(per_minute, WINDOWS["minute"]),
+            "hour": TokenBucket(per_hour, WINDOWS["hour"]),
+            "day": TokenBucket(per_day, WINDOWS["day"], refill=False),
+        }
+        self._next_send = 0.0
+        self._cooldown_until = 0.0
+        self._consecutive_throttles = 0
+        self._lock = threading.Lock()
+
+        if store is not None:
+            usage = store.load(account)
+            now = time.monotonic()
+            for window, count in usage.items():
+                self.buckets[window].consume(now, min(count, self.buckets[window].capacity))
+            logger.info(f"Quota for {account}: {usage['hour']} sent this hour, {usage['day']} today")
+
+    def remaining(self, window: str = "day") -> int:
+        """Whole tokens currently available in a window"""
+        with self._lock:
+            bucket = self.buckets[window]
+            bucket._refill(time.monotonic())
+            return max(0, int(bucket.tokens))
+
+    def _wait_time(self, now: float) -> float:
+        return max(self._cooldown_until - now, self._next_send - now, self.buckets["hour"].wait_time(now), self.buckets["minute"].wait_time(now))
+
+    def ready_in(self) -> float:
+        """Seconds until acquire would succeed without waiting (infinite once the daily budget is gone)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.buckets["day"].wait_time(now) > 0:
+                return float("inf")
+            return max(0.0, self._wait_time(now))
+
+    def acquire(self, block: bool = True) -> bool:
+        """Takes one send slot, sleeping as needed. Raises QuotaExceededError when the daily budget is gone"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.buckets["day"].wait_time(now) > 0:
+                    raise QuotaExceededError(f"Daily quota exhausted for {self.account}")
+
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    for bucket in self.buckets.values():
+                        bucket.consume(now)
+                    self._next_send = now + 60.0 / self.rate
+
+            if wait <= 0:
+                if self.store is None or self._reserve():
+                    return True
+                wait = self.ready_in()
+
+            if not block:
+                return False
+            time.sleep(min(wait, 5.0))
+
+    def _reserve(self) -> bool:
+        """Counts the slot in the shared store. False (and the local window emptied) if another process used it up"""
+        full, usage = self.store.reserve(self.account, {window: self.buckets[window].capacity for window in ("hour", "day")})
+        with self._lock:
+            now = time.monotonic()
+            if full is not None:
+                self.buckets[full].consume(now, self.buckets[full].tokens)
+                if full == "day":
+                    raise QuotaExceededError(f"Daily quota exhausted for {self.account}")
+                return False
+            # Other processes share the account: the local estimate never exceeds what the store has left
+            for window, count in usage.items():
+                bucket = self.buckets[window]
+                bucket.consume(now, max(0.0, bucket.tokens - (bucket.capacity - count)))
+            return True
+
+    def on_success(self) -> None:
+        """Additive increase after an accepted message"""
+        with self._lock:
+            self.sent += 1
+            self._consecutive_throttles = 0
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def on_throttle(self) -> float:
+        """Multiplicative decrease and exponential pause after a throttling reply. Returns the pause"""
+        with self._lock:
+            self.throttled += 1
+            self._consecutive_throttles += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (self._consecutive_throttles - 1))
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + backoff)
+        logger.warning(f"Throttled ({self.account}): rate down to {self.rate:.1f}/min, pausing {backoff:.0f}s")
+        return backoff
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
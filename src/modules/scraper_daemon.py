@@ -0,0 +1,302 @@
+import argparse
+import json
+import logging
+import os
+import re
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET = ".scraper-daemon.sock"
+
+
+def socket_path():
+    return config("SCRAPER_DAEMON_SOCKET", default=DEFAULT_SOCKET)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Una petición por conexión: una línea JSON de entrada y eventos JSON (uno por línea) de salida"""
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+
+        def send(event):
+            self.wfile.write(json.dumps(event, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+        try:
+            self.server.daemon.handle(json.loads(line), send)
+        except (BrokenPipeError, ConnectionResetError):
+            logger.warning("El cliente cerró la conexión antes de terminar")
+        except Exception as e:
+            logger.error(f"Error atendiendo petición: {str(e)}")
+            try:
+                send({"event": "error", "message": str(e)})
+            except OSError:
+                pass
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class ScraperDaemon:
+    """Mantiene un FcienciasScraper con navegador (o pool) y sesión abiertos y atiende trabajos por un socket Unix.
+
+    Operaciones: ping, fetch (HTML de una URL), subjects, professors (de una asignatura), crawl
+    (emite cada profesor en cuanto se extrae, como scrape_all_professors) y shutdown. Los trabajos
+    que usan el navegador se atienden de uno en uno; ping responde aunque haya un crawl en curso.
+    """
+
+    def __init__(self, scraper, path=None):
+        self.scraper = scraper
+        self.path = path or socket_path()
+        self.started_at = None
+        self.jobs = 0
+        self._job_lock = threading.Lock()
+        self._server = None
+
+    def handle(self, request, send):
+        op = request.get("op")
+        if op == "ping":
+            send({"event": "done", "result": self.status()})
+            return
+        if op == "shutdown":
+            send({"event": "done", "result": {"stopping": True}})
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+            return
+
+        with self._job_lock:
+            self.jobs += 1
+            if not self.scraper.ensure_session():
+                raise Exception("No se pudo iniciar sesión en el portal")
+
+            if op == "fetch":
+                result = {"html": self.scraper.fetch_page(request["url"])}
+            elif op == "subjects":
+                result = self.scraper.get_subjects()
+            elif op == "professors":
+                result = self.scraper.get_professors_from_subject(request["url"], request["name"])
+            elif op == "crawl":
+                result = self._crawl(request, send)
+            else:
+                raise ValueError(f"Operación desconocida: {op}")
+        send({"event": "done", "result": result})
+
+    def _crawl(self, request, send):
+        # --refresh-pattern del cliente: solo para este crawl
+        page_cache = self.scraper.page_cache
+        refresh_patterns = request.get("refresh_patterns") or []
+        if page_cache is not None and refresh_patterns:
+            saved_patterns = page_cache.refresh_patterns
+            page_cache.refresh_patterns = saved_patterns + [re.compile(pattern) for pattern in refresh_patterns]
+        try:
+            return self._stream_crawl(request, send)
+        finally:
+            if page_cache is not None and refresh_patterns:
+                page_cache.refresh_patterns = saved_patterns
+
+    def _stream_crawl(self, request, send):
+        professors = self.scraper.scrape_all_professors(
+            max_subjects=request.get("max_subjects"),
+            known_professors=request.get("known_professors"),
+            max_age=request.get("max_age"),
+            resume_run_id=request.get("resume_run_id"),
+        )
+        try:
+            for professor in professors:
+                send({"event": "professor", "data": professor})
+        finally:
+            # Si el cliente se desconecta, el generador cierra su checkpoint; la sesión sigue abierta
+            professors.close()
+        return {"subjectAssociations": self.scraper.subject_associations, "runId": self.scraper.run_id}
+
+    def status(self):
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started_at, 1),
+            "jobs": self.jobs,
+            "busy": self._job_lock.locked(),
+            "backend": self.scraper.backend,
+            "options": self.options(),
+            "browserPool": self.scraper.browser_pool.stats() if self.scraper.browser_pool else None,
+            "pages": self.scraper.page_stats.summary(),
+            "crawlDelay": self.scraper.crawl_delay.metrics(),
+        }
+
+    def options(self):
+        """Configuración del scraper fijada al arrancar el daemon, con los nombres de los parámetros de FcienciasScraper"""
+        return {
+            "backend": self.scraper.backend,
+            "max_concurrency": self.scraper.max_concurrency,
+            "rate_limit": self.scraper.rate_limit,
+            "parse_workers": self.scraper.parse_workers,
+            "browsers": self.scraper.browsers,
+            "lean_browser": self.scraper.lean_browser,
+            "use_cache": self.scraper.use_cache,
+            "reuse_session": self.scraper.reuse_session,
+        }
+
+    def serve_forever(self):
+        if os.path.exists(self.path):
+            if DaemonClient(self.path).ping() is not None:
+                raise RuntimeError(f"Ya hay un daemon escuchando en {self.path}")
+            os.remove(self.path)
+
+        logger.info("Abriendo navegador e iniciando sesión...")
+        self.scraper.start_session()
+        self.started_at = time.time()
+        self._server = _UnixServer(self.path, _RequestHandler)
+        self._server.daemon = self
+        os.chmod(self.path, 0o600)
+        logger.info(f"Daemon de scraping listo en {self.path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.scraper.close_session()
+            logger.info("Daemon de scraping detenido")
+
+
+class DaemonClient:
+    """Cliente del daemon; tiene los métodos de FcienciasScraper que usan los scripts, ejecutados en el daemon"""
+
+    def __init__(self, path=None, timeout=None, refresh_patterns=None):
+        self.path = path or socket_path()
+        self.timeout = timeout
+        self.refresh_patterns = refresh_patterns or []
+        self.subject_associations = []
+        self.run_id = None
+
+    def _events(self, request):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            sock.sendall(json.dumps(request).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as stream:
+                for line in stream:
+                    event = json.loads(line)
+                    if event["event"] == "error":
+                        raise Exception(f"Error en el daemon: {event['message']}")
+                    yield event
+                    if event["event"] == "done":
+                        return
+        raise ConnectionError("El daemon cerró la conexión sin terminar")
+
+    def _call(self, op, **params):
+        for event in self._events({"op": op, **params}):
+            if event["event"] == "done":
+                return event["result"]
+
+    def ping(self):
+        """Estado del daemon, o None si no hay ninguno escuchando"""
+        try:
+            return DaemonClient(self.path, timeout=2)._call("ping")
+        except (OSError, ValueError):
+            return None
+
+    def fetch(self, url):
+        return self._call("fetch", url=url)["html"]
+
+    def get_subjects(self):
+        return self._call("subjects")
+
+    def get_professors_from_subject(self, subject_url, subject_name):
+        return self._call("professors", url=subject_url, name=subject_name)
+
+    def scrape_all_professors(self, max_subjects=None, known_professors=None, max_age=None, resume_run_id=None):
+        """Igual que FcienciasScraper.scrape_all_professors, pero el crawl corre en el daemon"""
+        request = {
+            "op": "crawl",
+            "max_subjects": max_subjects,
+            "known_professors": known_professors,
+            "max_age": max_age,
+            "resume_run_id": resume_run_id,
+            "refresh_patterns": self.refresh_patterns,
+        }
+        for event in self._events(request):
+            if event["event"] == "professor":
+                yield event["data"]
+            elif event["event"] == "done":
+                self.subject_associations = event["result"]["subjectAssociations"]
+                self.run_id = event["result"]["runId"]
+
+    def shutdown(self):
+        return self._call("shutdown")
+
+
+def connect(use_daemon=True, refresh_patterns=None, **options):
+    """DaemonClient si hay un daemon escuchando en SCRAPER_DAEMON_SOCKET; None para usar un scraper local.
+
+    options son parámetros de FcienciasScraper pedidos por el script (None = no especificado). Los
+    fija el daemon al arrancar, así que si alguno no coincide con su configuración se regresa None
+    para que el script abra su propio scraper. refresh_patterns sí se aplica por crawl en el daemon.
+    """
+    if not use_daemon:
+        return None
+    client = DaemonClient(refresh_patterns=refresh_patterns)
+    if not os.path.exists(client.path):
+        return None
+    status = client.ping()
+    if status is None:
+        return None
+
+    daemon_options = status.get("options", {})
+    mismatched = [f"{name}={value!r}" for name, value in options.items() if value is not None and daemon_options.get(name) != value]
+    if mismatched:
+        logger.warning(f"El daemon en {client.path} corre con otra configuración ({', '.join(mismatched)}); se usa un scraper local")
+        return None
+    logger.info(f"Usando el daemon de scraping en {client.path} (pid {status['pid']}, {status['jobs']} trabajos atendidos)")
+    return client
+
+
+def main():
+    from src.modules.fciencias_scraper import FcienciasScraper
+
+    parser = argparse.ArgumentParser(description="Daemon con navegador y sesión del portal abiertos para los scripts de scraping")
+    parser.add_argument("--socket", default=None, help=f"Ruta del socket Unix (default: SCRAPER_DAEMON_SOCKET o {DEFAULT_SOCKET})")
+    parser.add_argument("--backend", choices=FcienciasScraper.BACKENDS, default=None, help="Backend de scraping (default: SCRAPER_BACKEND)")
+    parser.add_argument("--browsers", type=int, default=None, help="Navegadores del pool con el backend selenium (default: BROWSER_POOL_SIZE o 1)")
+    parser.add_argument("--lean-browser", action="store_true", default=None, help="Perfil ligero de Chrome (default: BROWSER_LEAN)")
+    parser.add_argument("--no-cache", action="store_true", help="No usar la caché de páginas en disco")
+    parser.add_argument("--status", action="store_true", help="Mostrar el estado del daemon en ejecución y salir")
+    parser.add_argument("--stop", action="store_true", help="Detener el daemon en ejecución y salir")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    client = DaemonClient(args.socket)
+    if args.status or args.stop:
+        status = client.ping()
+        if status is None:
+            print(f"No hay un daemon escuchando en {client.path}")
+            sys.exit(1)
+        print(json.dumps(status, indent=2, ensure_ascii=False))
+        if args.stop:
+            client.shutdown()
+        return
+
+    scraper = FcienciasScraper(
+        headless=not config("OPEN_BROWSER", default=False, cast=bool),
+        backend=args.backend,
+        use_cache=not args.no_cache,
+        browsers=args.browsers,
+        lean_browser=args.lean_browser,
+    )
+    try:
+        ScraperDaemon(scraper, args.socket).serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
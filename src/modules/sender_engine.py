@@ -0,0 +1,253 @@
+import logging
+import queue
+import random
+import smtplib
+import statistics
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .email_sender import EmailSender
+from .rate_limiter import AdaptiveRateLimiter, QuotaExceededError, is_throttle_error
+from .smtp_pool import PooledConnection, SmtpConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the connection is unusable and the message can be retried on a fresh one
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+
+class SenderAccount:
+    """One sending identity: its SMTP settings, its connection pool and (optionally) its rate limiter"""
+
+    def __init__(self, config: Dict, rate_limiter: Optional[AdaptiveRateLimiter] = None) -> None:
+        self.config = config
+        self.user = config["user"]
+        self.rate_limiter = rate_limiter
+        self.pool: Optional[SmtpConnectionPool] = None
+        self.exhausted = False
+        self.sent = 0
+
+    def open_pool(self, connect: Callable[[Dict], smtplib.SMTP], size: int, max_messages: int) -> None:
+        self.pool = SmtpConnectionPool(lambda: connect(self.config), size=size, max_messages=max_messages)
+
+    def budget(self) -> int:
+        """Messages left today; accounts without a limiter count as one share"""
+        if self.rate_limiter is None:
+            return 1
+        return self.rate_limiter.remaining("day")
+
+    def ready_in(self) -> float:
+        """Seconds until the account can send again"""
+        return 0.0 if self.rate_limiter is None else self.rate_limiter.ready_in()
+
+    def try_acquire(self) -> bool:
+        """Takes a send slot without waiting. False while the account is paced, cooling down or out of quota"""
+        if self.rate_limiter is None:
+            return True
+        try:
+            return self.rate_limiter.acquire(block=False)
+        except QuotaExceededError:
+            if not self.exhausted:
+                logger.warning(f"Daily quota exhausted for {self.user}")
+                self.exhausted = True
+            return False
+
+
+class AccountScheduler:
+    """Picks the account for each send, weighted by the daily budget each one has left.
+
+    Accounts that are pacing or cooling down after a throttling reply are skipped, so their share
+    of the work fails over to the others; if none is ready right now the caller sleeps until the
+    first one should be (at most poll_interval, since other workers may take that slot first).
+    """
+
+    def __init__(self, accounts: List[SenderAccount], poll_interval: float = 0.2) -> None:
+        self.accounts = accounts
+        self.poll_interval = poll_interval
+
+    def _weighted_order(self, accounts: List[SenderAccount]) -> List[SenderAccount]:
+        # Weighted random permutation (Efraimidis-Spirakis): bigger budgets tend to come first
+        return sorted(accounts, key=lambda account: random.random() ** (1.0 / max(account.budget(), 1)), reverse=True)
+
+    def acquire(self) -> SenderAccount:
+        """Blocks until some account has a send slot. Raises QuotaExceededError when all are exhausted"""
+        while True:
+            live = [account for account in self.accounts if not account.exhausted]
+            if not live:
+                raise QuotaExceededError("Daily quota exhausted for every sender account")
+            for account in self._weighted_order(live):
+                if account.try_acquire():
+                    return account
+            time.sleep(min([self.poll_interval] + [account.ready_in() for account in live]))
+
+
+class SenderEngine:
+    """Sends emails from a pool of worker threads, each holding its own pooled SMTP connections.
+
+    Recipients are fed through a bounded queue, so the source (usually a MongoDB cursor) is consumed
+    as fast as the workers drain it. A worker reconnects and retries once when the server drops its
+    connection, and gets a fresh connection after max_messages_per_connection sends.
+
+    Messages are spread over one or more sender accounts by an AccountScheduler. With rate limiters
+    every send takes a token from its account first; throttling replies (421/451/454) slow that
+    account down and the message is retried (usually on another account) up to max_throttle_retries
+    times. Once every account's daily quota is exhausted the engine stops feeding recipients and the
+    rest stay pending for the next run.
+    """
+
+    def __init__(
+        self,
+        email_sender: EmailSender,
+        workers: int = 4,
+        max_messages_per_connection: int = 100,
+        max_retries: int = 1,
+        accounts: Optional[List[SenderAccount]] = None,
+        max_throttle_retries: int = 5,
+    ) -> None:
+        self.email_sender = email_sender
+        self.workers = workers
+        self.max_retries = max_retries
+        self.max_throttle_retries = max_throttle_retries
+        self.accounts = accounts or [SenderAccount(email_sender.smtp_config)]
+        for account in self.accounts:
+            # One connection per worker and account, so acquiring never blocks
+            account.open_pool(email_sender._connect_smtp, size=workers, max_messages=max_messages_per_connection)
+        self.scheduler = AccountScheduler(self.accounts)
+        # Seconds each accepted message spent in sendmail (successful attempt only)
+        self.latencies: List[float] = []
+
+    def run(
+        self,
+        teachers: Iterable[Dict],
+        on_sent: Optional[Callable[[Dict], None]] = None,
+        on_error: Optional[Callable[[Dict, Exception], None]] = None,
+        on_skipped: Optional[Callable[[Dict], None]] = None,
+    ) -> Dict[str, int]:
+        """Sends one email per teacher. Callbacks run in the worker threads.
+
+        on_skipped gets the recipients already taken from the source but never attempted because the
+        quota ran out, so the caller can hand them back.
+        """
+        stats = {"total": 0, "sent": 0, "failed": 0, "skipped": 0}
+        stats_lock = threading.Lock()
+        jobs: queue.Queue = queue.Queue(maxsize=self.workers * 2)
+        stop = object()
+        quota_exhausted = threading.Event()
+
+        def worker() -> None:
+            # The worker's own connection per account; _deliver swaps them on reconnect or recycle
+            holder: Dict[str, PooledConnection] = {}
+            try:
+                while True:
+                    teacher = jobs.get()
+                    if teacher is stop:
+                        break
+                    if quota_exhausted.is_set():
+                        with stats_lock:
+                            stats["skipped"] += 1
+                        if on_skipped:
+                            on_skipped(teacher)
+                        continue
+                    try:
+                        account = self._deliver(holder, teacher)
+                        with stats_lock:
+                            stats["sent"] += 1
+                            account.sent += 1
+                        if on_sent:
+                            on_sent(teacher)
+                    except QuotaExceededError as e:
+                        with stats_lock:
+                            stats["skipped"] += 1
+                            if not quota_exhausted.is_set():
+                                logger.warning(f"{e}; remaining recipients stay pending")
+                                quota_exhausted.set()
+                        if on_skipped:
+                            on_skipped(teacher)
+                    except Exception as e:
+                        with stats_lock:
+                            stats["failed"] += 1
+                        if on_error:
+                            on_error(teacher, e)
+            finally:
+                for account in self.accounts:
+                    conn = holder.pop(account.user, None)
+                    if conn is not None:
+                        account.pool.release(conn)
+
+        threads = [threading.Thread(target=worker, name=f"smtp-worker-{i}", daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for teacher in teachers:
+                stats["total"] += 1
+                jobs.put(teacher)
+                # Checked after handing over, so no recipient is taken from the source and dropped
+                if quota_exhausted.is_set():
+                    break
+        finally:
+            for _ in threads:
+                jobs.put(stop)
+            for thread in threads:
+                thread.join()
+            for account in self.accounts:
+                account.pool.close()
+
+        for account in self.accounts:
+            pool = account.pool
+            logger.info(f"{account.user}: {account.sent} sent; SMTP pool {pool.created} connections opened, {pool.recycled} recycled, {pool.dropped} dropped")
+        return stats
+
+    def latency_percentiles(self) -> Dict[str, float]:
+        """p50/p95/p99 of the sendmail latency in milliseconds (empty if nothing was sent)"""
+        if len(self.latencies) < 2:
+            return {}
+        cuts = statistics.quantiles(self.latencies, n=100)
+        return {"p50": cuts[49] * 1000, "p95": cuts[94] * 1000, "p99": cuts[98] * 1000}
+
+    def _deliver(self, holder: Dict[str, PooledConnection], teacher: Dict) -> SenderAccount:
+        """Sends one message, reconnecting if the server dropped it and failing over when an account is throttled.
+
+        Returns the account that delivered it. Teachers carrying a pre-rendered "message" (bytes)
+        are sent as is, apart from the From header; the rest are rendered here.
+        """
+        raw_message = teacher.get("message") or self.email_sender.render_message(teacher)
+        attempt = 0
+        throttles = 0
+
+        while True:
+            account = self.scheduler.acquire()
+            conn = holder.get(account.user)
+            if conn is None:
+                conn = holder[account.user] = account.pool.acquire()
+            try:
+                started = time.perf_counter()
+                conn.sendmail(account.user, [teacher["email"]], self.email_sender.with_sender(raw_message, account.user))
+                self.latencies.append(time.perf_counter() - started)
+            except CONNECTION_ERRORS:
+                account.pool.release(holder.pop(account.user), broken=True)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning(f"SMTP connection dropped, retrying {teacher['email']} on a new one")
+                continue
+            except smtplib.SMTPResponseException as e:
+                if account.rate_limiter is None or not is_throttle_error(e):
+                    raise
+                # 421 closes the session; 451/454 leave it usable
+                if e.smtp_code == 421:
+                    account.pool.release(holder.pop(account.user), broken=True)
+                account.rate_limiter.on_throttle()
+                throttles += 1
+                if throttles > self.max_throttle_retries:
+                    raise
+                continue
+
+            if account.rate_limiter is not None:
+                account.rate_limiter.on_success()
+
+            if conn.messages_sent >= account.pool.max_messages:
+                # Recycle: the next message on this account opens a fresh connection
+                account.pool.release(holder.pop(account.user))
+            return account
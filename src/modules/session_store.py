@@ -0,0 +1,75 @@
+import base64
+import hashlib
+import json
+import logging
+import os
+import time
+
+from cryptography.fernet import Fernet, InvalidToken
+
+logger = logging.getLogger(__name__)
+
+SALT_SIZE = 16
+PBKDF2_ITERATIONS = 200_000
+
+
+class SessionStore:
+    """Cookies de la sesión del portal guardadas cifradas en disco entre corridas.
+
+    El archivo es la sal seguida de un token Fernet; la clave se deriva del secreto (por defecto
+    usuario y contraseña del portal) con PBKDF2-SHA256, así que cambiar la contraseña invalida la
+    sesión guardada.
+    """
+
+    def __init__(self, path, secret, max_age=None):
+        self.path = path
+        self.secret = secret.encode("utf-8")
+        self.max_age = max_age
+
+    def _fernet(self, salt):
+        key = hashlib.pbkdf2_hmac("sha256", self.secret, salt, PBKDF2_ITERATIONS)
+        return Fernet(base64.urlsafe_b64encode(key))
+
+    def load(self):
+        """Cookies guardadas y vigentes, o None si no hay sesión utilizable"""
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        try:
+            session = json.loads(self._fernet(data[:SALT_SIZE]).decrypt(data[SALT_SIZE:]))
+        except (InvalidToken, ValueError):
+            logger.warning("La sesión guardada no se pudo descifrar (¿cambió la contraseña?); se descarta")
+            self.clear()
+            return None
+
+        age = time.time() - session["savedAt"]
+        if self.max_age and age > self.max_age:
+            logger.info(f"La sesión guardada tiene {age / 3600:.1f} h; se hará login de nuevo")
+            return None
+
+        now = time.time()
+        return [cookie for cookie in session["cookies"] if "expiry" not in cookie or cookie["expiry"] > now]
+
+    def save(self, cookies):
+        salt = os.urandom(SALT_SIZE)
+        token = self._fernet(salt).encrypt(json.dumps({"savedAt": time.time(), "cookies": cookies}).encode("utf-8"))
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Escritura atómica y solo legible por el usuario
+        tmp_path = f"{self.path}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(salt + token)
+        os.replace(tmp_path, self.path)
+        logger.info(f"Sesión guardada en {self.path} ({len(cookies)} cookies)")
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
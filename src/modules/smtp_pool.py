@@ -0,0 +1,104 @@
+import logging
+import smtplib
+import threading
+import time
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    """Logged-in SMTP connection plus the bookkeeping the pool needs to recycle it"""
+
+    def __init__(self, server: smtplib.SMTP) -> None:
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+    def sendmail(self, from_addr: str, to_addrs, msg) -> None:
+        self.server.sendmail(from_addr, to_addrs, msg)
+        self.messages_sent += 1
+        self.last_used = time.monotonic()
+
+    def send_message(self, msg) -> None:
+        self.server.send_message(msg)
+        self.messages_sent += 1
+        self.last_used = time.monotonic()
+
+    def is_alive(self) -> bool:
+        """Health check: NOOP must answer 250"""
+        try:
+            return self.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def close(self) -> None:
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SmtpConnectionPool:
+    """Bounded pool of authenticated SMTP connections.
+
+    Idle connections are health-checked with NOOP before being handed out again if they sat unused
+    longer than idle_check_after seconds, and are closed once they have sent max_messages messages.
+    """
+
+    def __init__(self, connect: Callable[[], smtplib.SMTP], size: int = 4, max_messages: int = 100, idle_check_after: float = 30.0) -> None:
+        self._connect = connect
+        self.size = size
+        self.max_messages = max_messages
+        self.idle_check_after = idle_check_after
+        self.created = 0
+        self.recycled = 0
+        self.dropped = 0
+        self._idle: List[PooledConnection] = []
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+
+    def acquire(self) -> PooledConnection:
+        """Returns a healthy connection, blocking while all of them are in use"""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._open()
+                if time.monotonic() - conn.last_used < self.idle_check_after or conn.is_alive():
+                    return conn
+                logger.info("Dropping stale SMTP connection")
+                self.dropped += 1
+                conn.close()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: PooledConnection, broken: bool = False) -> None:
+        """Returns a connection to the pool, closing it if it broke or reached max_messages"""
+        try:
+            if broken:
+                self.dropped += 1
+                conn.close()
+            elif conn.messages_sent >= self.max_messages:
+                self.recycled += 1
+                conn.close()
+            else:
+                with self._lock:
+                    self._idle.append(conn)
+        finally:
+            self._slots.release()
+
+    def _open(self) -> PooledConnection:
+        conn = PooledConnection(self._connect())
+        self.created += 1
+        return conn
+
+    def close(self) -> None:
+        """Closes every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
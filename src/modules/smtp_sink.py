@@ -0,0 +1,203 @@
+import argparse
+import asyncio
+import logging
+import random
+import ssl
+import threading
+import time
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_SIZE = 10 * 1024 * 1024
+EHLO_EXTENSIONS = ("AUTH PLAIN LOGIN", "8BITMIME", f"SIZE {MAX_MESSAGE_SIZE}")
+
+
+def _address(command: str) -> str:
+    """Address of a MAIL FROM:<...> or RCPT TO:<...> command, without the ESMTP parameters"""
+    argument = command.partition(":")[2].strip()
+    return argument.split(" ", 1)[0].strip("<>") if argument else ""
+
+
+class SmtpSink:
+    """Local SMTP server that accepts and discards mail, for measuring the sending path offline.
+
+    Speaks just enough SMTP for smtplib: EHLO, AUTH (any credentials), MAIL, RCPT, DATA, NOOP, RSET
+    and QUIT. With certfile/keyfile it listens with implicit TLS like port 465. latency (plus a
+    random jitter) delays every DATA reply, and error_rate answers that fraction of messages with
+    one of error_codes instead of 250; 421 also closes the connection, as real servers do.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        certfile: Optional[str] = None,
+        keyfile: Optional[str] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_codes: Iterable[int] = (451,),
+        keep_messages: bool = False,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_codes = tuple(error_codes)
+        self.keep_messages = keep_messages
+        self.messages: List[Tuple[str, List[str], bytes]] = []
+        self.stats: Counter = Counter()
+        self._random = random.Random(seed)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if not self.certfile:
+            return None
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(self.certfile, self.keyfile)
+        return context
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.stats["connections"] += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode("ascii") + b"\r\n")
+            await writer.drain()
+
+        mail_from, recipients = "", []
+        try:
+            await reply("220 localhost ESMTP sink")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode("utf-8", "replace").strip()
+                verb = command[:4].upper()
+
+                if verb in ("EHLO", "HELO"):
+                    lines = ["localhost"] + list(EHLO_EXTENSIONS) if verb == "EHLO" else ["localhost"]
+                    for extension in lines[:-1]:
+                        writer.write(f"250-{extension}\r\n".encode("ascii"))
+                    await reply(f"250 {lines[-1]}")
+                elif verb == "AUTH":
+                    if command.upper().startswith("AUTH LOGIN"):
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    await reply("235 2.7.0 Authentication successful")
+                elif verb == "MAIL":
+                    mail_from, recipients = _address(command), []
+                    await reply("250 2.1.0 OK")
+                elif verb == "RCPT":
+                    recipients.append(_address(command))
+                    await reply("250 2.1.5 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    if not await self._accept(reply, mail_from, recipients, data):
+                        break
+                elif verb == "RSET":
+                    mail_from, recipients = "", []
+                    await reply("250 2.0.0 OK")
+                elif verb == "NOOP":
+                    await reply("250 2.0.0 OK")
+                elif verb == "QUIT":
+                    await reply("221 2.0.0 Bye")
+                    break
+                else:
+                    await reply("502 5.5.2 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            self.stats["dropped_connections"] += 1
+        finally:
+            writer.close()
+
+    async def _accept(self, reply, mail_from: str, recipients: List[str], data: bytes) -> bool:
+        """Answers a finished DATA. False if the connection must be closed"""
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            code = self._random.choice(self.error_codes)
+            self.stats["errors"] += 1
+            self.stats[f"errors_{code}"] += 1
+            await reply(f"{code} 4.7.0 Injected error")
+            return code != 421
+
+        self.stats["messages"] += 1
+        self.stats["bytes"] += len(data) - 5
+        if self.keep_messages:
+            self.messages.append((mail_from, recipients, data[:-5]))
+        await reply("250 2.0.0 OK queued")
+        return True
+
+    def start(self) -> Tuple[str, int]:
+        """Starts the server in a background thread. Returns (host, port), useful with port=0"""
+
+        async def serve() -> None:
+            self._loop = asyncio.get_running_loop()
+            self._server = await asyncio.start_server(self._handle, self.host, self.port, ssl=self._ssl_context(), limit=MAX_MESSAGE_SIZE)
+            self.port = self._server.sockets[0].getsockname()[1]
+            self._ready.set()
+            async with self._server:
+                try:
+                    await self._server.serve_forever()
+                except asyncio.CancelledError:
+                    pass
+
+        self._thread = threading.Thread(target=lambda: asyncio.run(serve()), name="smtp-sink", daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout=10):
+            raise RuntimeError("SMTP sink did not start")
+        logger.info(f"SMTP sink listening on {self.host}:{self.port}{' (TLS)' if self.certfile else ''}")
+        return self.host, self.port
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SMTP local que acepta y descarta correos, para pruebas de envío sin red")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--certfile", default=None, help="Certificado para escuchar con TLS implícito (como el puerto 465)")
+    parser.add_argument("--keyfile", default=None)
+    parser.add_argument("--latency", type=float, default=0.0, help="Segundos de espera antes de responder cada DATA")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Espera aleatoria adicional de 0 a JITTER segundos")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de mensajes que se rechazan")
+    parser.add_argument("--error-codes", type=int, nargs="+", default=[451], help="Códigos con los que se rechaza (421 cierra la conexión)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    sink = SmtpSink(args.host, args.port, args.certfile, args.keyfile, args.latency, args.jitter, args.error_rate, args.error_codes)
+    sink.start()
+    try:
+        while True:
+            time.sleep(10)
+            logger.info(f"Sink: {dict(sink.stats)}")
+    except KeyboardInterrupt:
+        sink.stop()
+
+
+if __name__ == "__main__":
+    main()
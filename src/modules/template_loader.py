@@ -1,25 +1,74 @@
+import threading
+import time
 from pathlib import Path
 from string import Template
 
 
+class FixedTemplate:
+    """Plantilla sin sustitución para el asunto fijo"""
+
+    def __init__(self, template_string):
+        self.template = template_string.strip()
+
+    def substitute(self, **kwargs):
+        return self.template
+
+    def get_identifiers(self):
+        return []
+
+    def is_valid(self):
+        return True
+
+
 class TemplateLoader:
-    def __init__(self, template_dir="src/templates"):
+    """Carga las plantillas una vez y las mantiene compiladas en memoria.
+
+    Cada plantilla se vuelve a leer solo si cambia su mtime; el stat se hace como mucho una vez cada
+    check_interval segundos, así que renderizar no toca el disco. Si se indican placeholders, al
+    cargar se valida que la plantilla no use variables fuera de ese conjunto.
+    """
+
+    def __init__(self, template_dir="src/templates", placeholders=None, check_interval=5.0):
         self.template_dir = Path(template_dir)
+        self.placeholders = set(placeholders) if placeholders is not None else None
+        self.check_interval = check_interval
+        self._cache = {}
+        self._lock = threading.Lock()
 
-    def load_template(self):
-        template_path = self.template_dir / "message.txt"
+    def _get(self, filename, factory):
+        now = time.monotonic()
+        cached = self._cache.get(filename)
+        if cached and now - cached["checked_at"] < self.check_interval:
+            return cached["template"]
 
-        with open(template_path, "r", encoding="utf-8") as f:
-            return Template(f.read())
+        with self._lock:
+            path = self.template_dir / filename
+            mtime = path.stat().st_mtime_ns
+            cached = self._cache.get(filename)
+            if cached and cached["mtime"] == mtime:
+                cached["checked_at"] = now
+                return cached["template"]
 
-    def load_subject_template(self):
-        with open(self.template_dir / "subject.txt", "r", encoding="utf-8") as f:
-            # Para el asunto fijo, creamos un Template pero no necesitamos sustitución
-            class FixedTemplate:
-                def __init__(self, template_string):
-                    self.template = template_string.strip()
+            with open(path, "r", encoding="utf-8") as f:
+                template = factory(f.read())
+            self._validate(filename, template)
+
+            self._cache[filename] = {"template": template, "mtime": mtime, "checked_at": now}
+            return template
+
+    def _validate(self, filename, template):
+        """Falla al cargar si la plantilla es inválida o usa variables que no se van a proporcionar"""
+        if not template.is_valid():
+            raise ValueError(f"La plantilla {filename} tiene placeholders mal formados")
 
-                def substitute(self, **kwargs):
-                    return self.template
+        if self.placeholders is not None:
+            unknown = set(template.get_identifiers()) - self.placeholders
+            if unknown:
+                raise ValueError(f"La plantilla {filename} usa variables sin valor: {', '.join(sorted(unknown))}")
 
-            return FixedTemplate(f.read())
+    def load_template(self):
+        return self._get("message.txt", Template)
+
+    def load_subject_template(self):
+        # Para el asunto fijo, creamos un Template pero no necesitamos sustitución
+        return self._get("subject.txt", FixedTemplate)